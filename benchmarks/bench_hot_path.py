@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the code that runs on every match update tick:
+snapshot parsing, player score aggregation, DMT scoring and embed rendering.
+
+Fixtures are realistic 100-player get_detailed_players payloads in every
+shape the parser accepts. Run from the repository root:
+
+    python benchmarks/bench_hot_path.py
+    python benchmarks/bench_hot_path.py --number 500 --shape by_player_id
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import enhanced_discord_bot as hll  # noqa: E402
+
+PLAYER_COUNT = 100
+SQUADS = ['Able', 'Baker', 'Charlie', 'Dog', 'Easy', 'Fox', 'George', 'How', 'Command']
+ROLES = ['tankcommander', 'crewman', 'armycommander', 'rifleman', 'support']
+
+
+def make_player(rng, index, team):
+    """One player entry with the fields a full get_detailed_players response carries"""
+    return {
+        'name': f"Player{index:03d}",
+        'player_id': f"7656119800000{index:04d}",
+        'team': team,
+        'unit_id': rng.randint(0, 8),
+        'unit_name': rng.choice(SQUADS),
+        'role': rng.choice(ROLES),
+        'loadout': 'standard',
+        'level': rng.randint(1, 500),
+        'kills': rng.randint(0, 60),
+        'deaths': rng.randint(0, 40),
+        'combat': rng.randint(0, 400),
+        'offense': rng.randint(0, 300),
+        'defense': rng.randint(0, 300),
+        'support': rng.randint(0, 500),
+        'is_vip': False,
+        'country': 'private',
+        'profile': None,
+    }
+
+
+def group_by_squad(players):
+    squads = {}
+    for player in players:
+        squads.setdefault(player['unit_name'], []).append(player)
+    return squads
+
+
+def make_fixtures(seed=1234):
+    """Build a get_live_game_state result for every accepted detailed_players shape"""
+    rng = random.Random(seed)
+    allied = [make_player(rng, i, 'allies') for i in range(PLAYER_COUNT // 2)]
+    axis = [make_player(rng, i, 'axis') for i in range(PLAYER_COUNT // 2, PLAYER_COUNT)]
+    by_id = {p['player_id']: p for p in allied + axis}
+
+    shapes = {
+        'by_player_id': {'result': {'players': by_id}},
+        'team_lists': {'result': {'players': {'allied': allied, 'axis': axis}}},
+        'team_player_lists': {'result': {'players': {'allied': {'players': allied}, 'axis': {'players': axis}}}},
+        'team_squad_lists': {'result': {'players': {
+            'allied': {'squads': group_by_squad(allied)},
+            'axis': {'squads': group_by_squad(axis)},
+        }}},
+        'team_squad_dicts': {'result': {'players': {
+            'allied': {'squads': {k: {'players': v} for k, v in group_by_squad(allied).items()}},
+            'axis': {'squads': {k: {'players': v} for k, v in group_by_squad(axis).items()}},
+        }}},
+        'result_teams': {'result': {'allied': allied, 'axis': axis}},
+        'bare_teams': {'allied': allied, 'axis': axis},
+    }
+
+    game_state = {'result': {
+        'num_allied_players': len(allied),
+        'num_axis_players': len(axis),
+        'allied_score': 2,
+        'axis_score': 3,
+        'time_remaining': 3120,
+        'current_map': {'id': 'elsenborn_warfare_day', 'pretty_name': 'Elsenborn Ridge Warfare'},
+    }}
+    map_info = {'result': {'id': 'elsenborn_warfare_day', 'pretty_name': 'Elsenborn Ridge Warfare'}}
+
+    return {
+        name: {
+            'game_state': game_state,
+            'map_info': map_info,
+            'detailed_players': detailed,
+            'timestamp': None,
+        }
+        for name, detailed in shapes.items()
+    }
+
+
+def make_clock(live_data):
+    """A running clock that has just processed `live_data`"""
+    clock = hll.ClockState()
+    clock.started = True
+    clock.clock_started = True
+    clock.active = 'A'
+    clock.time_a = 900.0
+    clock.time_b = 640.0
+    clock.last_switch = hll.datetime.datetime.now(hll.timezone.utc)
+    clock.game_data = live_data
+    clock.snapshot = hll.parse_game_snapshot(live_data)
+    clock.last_update = clock.snapshot.timestamp or clock.last_switch
+    clock.update_player_scores()
+    return clock
+
+
+def measure(fn, number):
+    """Time `fn` over `number` calls, then trace the allocations of one call"""
+    fn()  # Warm up caches and lazy imports
+
+    timings = []
+    for _ in range(number):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    snapshot_before = tracemalloc.take_snapshot()
+    fn()
+    snapshot_after = tracemalloc.take_snapshot()
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    blocks = sum(stat.count_diff for stat in snapshot_after.compare_to(snapshot_before, 'lineno') if stat.count_diff > 0)
+
+    timings.sort()
+    return {
+        'mean_us': statistics.mean(timings) * 1e6,
+        'p95_us': timings[int(len(timings) * 0.95) - 1] * 1e6,
+        'peak_kib': (peak - before) / 1024,
+        'retained_kib': (after - before) / 1024,
+        'blocks': blocks,
+    }
+
+
+def benchmarks_for(live_data):
+    """The hot-path calls to time for one payload shape"""
+    clock = make_clock(live_data)
+    detailed = live_data['detailed_players']
+    result = detailed.get('result', detailed)
+    teams = result.get('players', result) if isinstance(result, dict) else {}
+
+    # Built once so the timing covers scoring, not ClockState construction
+    scratch = hll.ClockState()
+
+    def add_player_scores():
+        scratch.player_scores = {'allied': {}, 'axis': {}}
+        scratch.dmt.reset()
+        for player in clock.snapshot.players:
+            scratch._add_player_score(player)
+
+    def dmt_cold():
+        clock.update_player_scores()
+        clock.calculate_dmt_score('allied')
+        clock.calculate_dmt_score('axis')
+
+    def dmt_cached():
+        clock.calculate_dmt_score('allied')
+        clock.calculate_dmt_score('axis')
+
+    body = json.dumps(detailed).encode()
+    yield 'json.loads (stdlib)', lambda: json.loads(body)
+    yield 'decode_detailed_players', lambda: hll.decode_detailed_players(body)
+    yield 'parse_game_snapshot', lambda: hll.parse_game_snapshot(live_data)
+    yield 'update_player_scores', clock.update_player_scores
+    if isinstance(teams, dict) and ('allied' in teams or 'axis' in teams):
+        yield '_process_team_scores', lambda: hll._process_team_scores(teams.get('allied', []), 'allied', [])
+    yield '_add_player_score (all players)', add_player_scores
+    yield 'calculate_dmt_score (new snapshot)', dmt_cold
+    yield 'calculate_dmt_score (cached)', dmt_cached
+    yield 'record_timeline', clock.record_timeline
+    yield 'get_game_info', clock.get_game_info
+    yield 'render_context', clock.render_context
+    yield 'build_embed', lambda: hll.build_embed(clock)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--number', type=int, default=200, help="calls timed per benchmark")
+    parser.add_argument('--shape', help="only run one payload shape")
+    args = parser.parse_args()
+
+    # Keep the per-tick INFO logs from flooding the report
+    hll.logger.setLevel(logging.WARNING)
+
+    fixtures = make_fixtures()
+    shapes = [args.shape] if args.shape else list(fixtures)
+
+    print(f"{PLAYER_COUNT} players, {args.number} calls per benchmark, Python {sys.version.split()[0]}")
+    header = f"{'shape':<18} {'function':<36} {'mean µs':>10} {'p95 µs':>10} {'peak KiB':>9} {'kept KiB':>9} {'blocks':>7}"
+    print(header)
+    print('-' * len(header))
+
+    for shape in shapes:
+        for name, fn in benchmarks_for(fixtures[shape]):
+            r = measure(fn, args.number)
+            print(f"{shape:<18} {name:<36} {r['mean_us']:>10.1f} {r['p95_us']:>10.1f} "
+                  f"{r['peak_kib']:>9.1f} {r['retained_kib']:>9.1f} {r['blocks']:>7}")
+
+
+if __name__ == '__main__':
+    main()
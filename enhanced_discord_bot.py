@@ -6,35 +6,134 @@ Updated with corrected CRCON API endpoints
 """
 
 import asyncio
+import atexit
+import contextvars
 import os
+from array import array
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor
 import discord
 import datetime
 import json
+import glob
+import gzip
+import zlib
+import hashlib
 import aiohttp
+from aiohttp import web
 import logging
+from logging.handlers import QueueHandler, QueueListener
+import queue
+import random
+import re
+import sys
+import time
 from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Union
+from urllib.parse import urlsplit
 from dotenv import load_dotenv
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord import app_commands
 from datetime import timezone, timedelta
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler()  # Railway captures stdout
-    ]
-)
+# Optional faster JSON backends - the stdlib json module is used without them
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+load_dotenv()
+
+# Subsystem loggers that LOG_LEVELS can address by their short name
+LOG_SUBSYSTEMS = ('crcon', 'tick')
+
+class DeferredQueueHandler(QueueHandler):
+    """Queues records as they are, so %-formatting happens on the listener thread"""
+
+    def prepare(self, record):
+        return record
+
+# (channel id, tick token) of the match update tick running in this task, set by match_updater
+current_tick = contextvars.ContextVar('current_tick', default=None)
+
+class SampleFilter(logging.Filter):
+    """Samples whole match update ticks: every record of one tick per match every `seconds`.
+
+    Records logged outside a tick are sampled per message template and first
+    argument, so e.g. allied and axis lines are sampled separately.
+    """
+
+    def __init__(self, seconds):
+        super().__init__()
+        self.seconds = seconds
+        self._sampled = {}  # channel id or (template, first arg) -> (monotonic time, tick token)
+
+    def filter(self, record):
+        tick = current_tick.get()
+        if tick is not None:
+            key, token = tick
+        else:
+            first = record.args[:1] if isinstance(record.args, tuple) else ()
+            key, token = (record.msg, first), None
+
+        now = time.monotonic()
+        sampled = self._sampled.get(key)
+        if sampled is not None:
+            at, sampled_token = sampled
+            if token is not None and token is sampled_token:
+                return True  # The rest of a tick that was sampled
+            if now - at < self.seconds:
+                return False
+        self._sampled[key] = (now, token)
+        return True
+
+def setup_logging():
+    """Send all logging through a queue drained by a background thread.
+
+    LOG_LEVEL sets the base level; LOG_LEVELS overrides it per subsystem, e.g.
+    "tick=DEBUG,crcon=WARNING,discord.gateway=WARNING". Per-tick debug records
+    are sampled to one whole tick per match every LOG_TICK_SAMPLE_SECONDS.
+    """
+    stream = logging.StreamHandler()  # Railway captures stdout
+    stream.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, stream, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper(), handlers=[DeferredQueueHandler(log_queue)])
+
+    for entry in os.getenv('LOG_LEVELS', '').split(','):
+        name, _, level = entry.partition('=')
+        name = name.strip()
+        if not name or not level.strip():
+            continue
+        if name in LOG_SUBSYSTEMS:
+            name = f"{__name__}.{name}"
+        try:
+            logging.getLogger(name).setLevel(level.strip().upper())
+        except ValueError:
+            logging.getLogger(__name__).warning(f"Ignoring invalid log level in LOG_LEVELS: {entry}")
+
+    sample_seconds = float(os.getenv('LOG_TICK_SAMPLE_SECONDS', '30'))
+    if sample_seconds > 0:
+        logging.getLogger(f"{__name__}.tick").addFilter(SampleFilter(sample_seconds))
+    return listener
+
+setup_logging()
 logger = logging.getLogger(__name__)
+crcon_logger = logger.getChild('crcon')  # CRCON requests and broadcasts
+tick_logger = logger.getChild('tick')    # Per-tick scoring and capture detection, sampled
 
 # Create directories if running locally (Railway handles this differently)
 if not os.getenv('RAILWAY_ENVIRONMENT'):
     for directory in ['logs', 'match_reports', 'match_data', 'backups']:
         os.makedirs(directory, exist_ok=True)
 
-load_dotenv()
-
 # Constants
 DEFAULT_MATCH_DURATION = 4500  # 1h 15m in seconds
 GAME_END_THRESHOLD = 30  # Stop match when server time is below this
@@ -42,170 +141,1643 @@ MESSAGE_TRUNCATE_LENGTH = 1900  # Max length for test messages
 MIN_UPDATE_INTERVAL = 5  # Minimum seconds between updates
 MAX_UPDATE_INTERVAL = 300  # Maximum seconds between updates
 
+# Fastest available decoder for CRCON response bodies
+if orjson is not None:
+    json_loads = orjson.loads
+elif msgspec is not None:
+    json_loads = msgspec.json.decode
+else:
+    json_loads = json.loads
+
+class MetricsRegistry:
+    """In-process counters and histograms, rendered in Prometheus text format"""
+
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self):
+        self._metrics = {}  # name -> {'type', 'help', 'labels', 'buckets', 'series'}
+
+    def counter(self, name, help_text, labels=()):
+        self._metrics[name] = {'type': 'counter', 'help': help_text, 'labels': tuple(labels), 'series': {}}
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self._metrics[name] = {'type': 'histogram', 'help': help_text, 'labels': tuple(labels),
+                               'buckets': tuple(buckets), 'series': {}}
+
+    def inc(self, name, amount=1, **labels):
+        metric = self._metrics[name]
+        key = tuple(str(labels.get(label, '')) for label in metric['labels'])
+        metric['series'][key] = metric['series'].get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        metric = self._metrics[name]
+        key = tuple(str(labels.get(label, '')) for label in metric['labels'])
+        series = metric['series'].get(key)
+        if series is None:
+            series = metric['series'][key] = [[0] * len(metric['buckets']), 0.0, 0]
+        for i, bound in enumerate(metric['buckets']):
+            if value <= bound:
+                series[0][i] += 1
+        series[1] += value
+        series[2] += 1
+
+    @staticmethod
+    def _label_text(names, values, extra=''):
+        pairs = []
+        for label, value in zip(names, values):
+            value = value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            pairs.append(f'{label}="{value}"')
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    def render(self):
+        """Prometheus text exposition of every metric"""
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+            for key, value in metric['series'].items():
+                if metric['type'] == 'counter':
+                    lines.append(f"{name}{self._label_text(metric['labels'], key)} {value}")
+                    continue
+                buckets, total, count = value
+                for bound, bucket_count in zip(metric['buckets'], buckets):
+                    labels = self._label_text(metric['labels'], key, f'le="{bound}"')
+                    lines.append(f"{name}_bucket{labels} {bucket_count}")
+                inf_labels = self._label_text(metric['labels'], key, 'le="+Inf"')
+                lines.append(f"{name}_bucket{inf_labels} {count}")
+                lines.append(f"{name}_sum{self._label_text(metric['labels'], key)} {total}")
+                lines.append(f"{name}_count{self._label_text(metric['labels'], key)} {count}")
+        return '\n'.join(lines) + '\n'
+
+metrics = MetricsRegistry()
+metrics.histogram('hll_tick_seconds', "Duration of match update ticks", ['channel'])
+metrics.counter('hll_tick_errors_total', "Match update ticks that raised", ['channel'])
+metrics.histogram('hll_crcon_request_seconds', "Duration of CRCON GET requests", ['endpoint'])
+metrics.counter('hll_crcon_request_errors_total', "CRCON GET requests that failed or returned non-200", ['endpoint'])
+metrics.histogram('hll_broadcast_seconds', "Duration of in-game message broadcasts")
+metrics.counter('hll_broadcast_messages_total', "In-game messages by result (sent/failed per player, server per server-wide message)", ['result'])
+metrics.histogram('hll_discord_edit_seconds', "Duration of Discord message edits", ['channel'])
+metrics.counter('hll_discord_edits_total', "Discord message edits by outcome", ['channel', 'outcome'])
+metrics.counter('hll_crcon_circuit_opens_total', "Times a CRCON circuit breaker opened", ['host'])
+metrics.counter('hll_game_messages_coalesced_total', "Queued in-game messages replaced by a newer one before sending")
+metrics.histogram('hll_event_loop_lag_seconds', "How late the event loop runs a timer, i.e. how long the loop was blocked")
+
+async def watch_event_loop_lag(interval=0.5):
+    """Record how late the loop wakes us - gateway heartbeats and interactions wait just as long"""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        metrics.observe('hll_event_loop_lag_seconds', max(0.0, loop.time() - expected))
+
+async def start_metrics_server():
+    """Serve /metrics for Prometheus; returns the runner, or None if disabled.
+
+    Only METRICS_PORT enables it, and it binds to localhost unless METRICS_HOST
+    says otherwise - the endpoint has no authentication.
+    """
+    port = os.getenv('METRICS_PORT')
+    if not port:
+        return None
+
+    async def handle_metrics(request):
+        return web.Response(text=metrics.render(), content_type='text/plain', charset='utf-8',
+                            headers={'X-Prometheus-Format': '0.0.4'})
+
+    app = web.Application()
+    app.router.add_get('/metrics', handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, os.getenv('METRICS_HOST', '127.0.0.1'), int(port)).start()
+    logger.info(f"📈 Metrics available on port {port} at /metrics")
+    return runner
+
+class TankOverwatchBot(commands.Bot):
+    """Bot that also shuts down the match updaters and shared CRCON clients"""
+
+    clocks_restored = False  # Journaled clocks are restored on the first on_ready only
+    commands_synced = False  # on_ready also fires on reconnects, which never need a sync
+    warmup_tasks = None
+    metrics_runner = None
+    loop_lag_task = None
+
+    async def setup_hook(self):
+        try:
+            self.metrics_runner = await start_metrics_server()
+        except Exception as e:
+            logger.warning(f"⚠️ Metrics server failed to start: {e}")
+        self.loop_lag_task = asyncio.create_task(watch_event_loop_lag())
+
+    async def close(self):
+        match_scheduler.stop_all()
+        await close_crcon_clients()
+        shutdown_parse_executor()
+        if self.loop_lag_task:
+            self.loop_lag_task.cancel()
+        for task in self.warmup_tasks or ():
+            task.cancel()
+        if self.metrics_runner:
+            await self.metrics_runner.cleanup()
+        await super().close()
+
 intents = discord.Intents.default()
 intents.message_content = False
-bot = commands.Bot(command_prefix="!", intents=intents)
+# Rate limits longer than this raise discord.RateLimited instead of blocking inside
+# discord.py, so the edit queue can re-queue and merge the edit (30s is the minimum)
+bot = TankOverwatchBot(command_prefix="!", intents=intents, max_ratelimit_timeout=30.0)
 
 clocks = {}
 # Parse LOG_CHANNEL_ID safely
 log_channel_str = os.getenv('LOG_CHANNEL_ID', '0')
 LOG_CHANNEL_ID = int(log_channel_str) if log_channel_str.isdigit() else 0
 
+class CRCONUnavailable(Exception):
+    """Raised instead of contacting a CRCON host whose circuit is open"""
+
+class CircuitBreaker:
+    """Stops hammering a CRCON host that is down.
+
+    After `threshold` consecutive failures the circuit opens and calls are refused
+    until an exponentially growing, jittered backoff expires. Then a single probe
+    is let through (half-open): success closes the circuit, failure reopens it
+    with a longer backoff.
+    """
+
+    def __init__(self, host, threshold=None, base_delay=None, max_delay=None):
+        self.host = host
+        self.threshold = threshold or int(os.getenv('CRCON_BREAKER_THRESHOLD', '3'))
+        self.base_delay = base_delay or float(os.getenv('CRCON_BACKOFF_BASE', '5'))
+        self.max_delay = max_delay or float(os.getenv('CRCON_BACKOFF_MAX', '300'))
+        self.state = 'closed'  # closed, open or half_open
+        self.failures = 0
+        self.opens = 0  # Consecutive times opened, drives the backoff
+        self.retry_at = 0.0
+        self._probing = False
+
+    def allow(self):
+        """Whether a call may go to the host now"""
+        if self.state == 'closed':
+            return True
+        if self.state == 'open' and time.monotonic() >= self.retry_at:
+            self.state = 'half_open'
+            logger.info(f"🟡 CRCON circuit for {self.host} half-open, probing")
+        if self.state == 'half_open' and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        if self.state != 'closed':
+            logger.info(f"🟢 CRCON circuit for {self.host} closed, connection restored")
+        self.state = 'closed'
+        self.failures = 0
+        self.opens = 0
+        self._probing = False
+
+    def release_probe(self):
+        """Give up a probe that ended without a result (e.g. its task was cancelled)"""
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.state == 'half_open' or self.failures >= self.threshold:
+            self._open()
+
+    def _open(self):
+        delay = min(self.max_delay, self.base_delay * 2 ** self.opens)
+        delay = random.uniform(delay / 2, delay)  # Jitter so matches don't retry in lockstep
+        self.opens += 1
+        self.state = 'open'
+        self.retry_at = time.monotonic() + delay
+        metrics.inc('hll_crcon_circuit_opens_total', host=self.host)
+        logger.warning(f"🔴 CRCON circuit for {self.host} open after {self.failures} failures, retrying in {delay:.0f}s")
+
+    def retry_in(self):
+        return max(0, int(self.retry_at - time.monotonic()))
+
+    def describe(self):
+        """Short state label for embeds"""
+        if self.state == 'open':
+            return f"🔴 CRCON Down (retry in {self.retry_in()}s)"
+        if self.state == 'half_open':
+            return "🟡 CRCON Reconnecting"
+        return "🟢 CRCON Connected"
+
+def _server_suffix(server):
+    return re.sub(r'\W', '_', server).upper()
+
+def server_env(server, key, default=None):
+    """Read KEY_<SERVER> for a named CRCON server, falling back to KEY"""
+    if server:
+        value = os.getenv(f"{key}_{_server_suffix(server)}")
+        if value:
+            return value
+    return os.getenv(key, default)
+
+def crcon_servers():
+    """Named CRCON server profiles: {name: (url, api_key)}, in CRCON_SERVERS order.
+
+    Each profile reads CRCON_URL_<NAME> and CRCON_API_KEY_<NAME>, falling back to
+    CRCON_URL and CRCON_API_KEY. Without CRCON_SERVERS there is one 'default' profile.
+    """
+    names = [name.strip() for name in os.getenv('CRCON_SERVERS', '').split(',') if name.strip()]
+    return {
+        name: (server_env(name, 'CRCON_URL', 'http://localhost:8010'), server_env(name, 'CRCON_API_KEY'))
+        for name in names or ['default']
+    }
+
+def crcon_server(server=None):
+    """Resolve a profile name (None = the first profile) to (name, url, api_key)"""
+    servers = crcon_servers()
+    if server is None:
+        server = next(iter(servers))
+    if server not in servers:
+        raise ValueError(f"Unknown CRCON server '{server}' (configured: {', '.join(servers)})")
+    return (server,) + servers[server]
+
+_crcon_breakers = {}
+
+def crcon_breaker(base_url=None):
+    """The circuit breaker shared by every client of a CRCON host"""
+    base_url = base_url or os.getenv('CRCON_URL', 'http://localhost:8010')
+    host = urlsplit(base_url).netloc or base_url
+    breaker = _crcon_breakers.get(host)
+    if breaker is None:
+        breaker = _crcon_breakers[host] = CircuitBreaker(host)
+    return breaker
+
+# Responses smaller than this are decoded inline even when parse workers are enabled
+PARSE_OFFLOAD_BYTES = 16 * 1024
+
+_parse_executor = None
+
+def parse_executor():
+    """Pool that decodes large CRCON responses off the event loop, or None to decode inline.
+
+    CRCON_PARSE_WORKERS sets the pool size (0 = decode inline) and CRCON_PARSE_POOL
+    picks 'process' (default) or 'thread' workers. Decoding and building the player
+    list is pure Python that holds the GIL, so thread workers only shorten the
+    stalls; process workers keep them off the bot loop.
+    """
+    global _parse_executor
+    if _parse_executor is None:
+        workers = int(os.getenv('CRCON_PARSE_WORKERS', '0'))
+        if workers <= 0:
+            return None
+        pool = os.getenv('CRCON_PARSE_POOL', 'process').lower()
+        if pool == 'thread':
+            _parse_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='crcon-parse')
+        else:
+            pool = 'process'
+            _parse_executor = ProcessPoolExecutor(max_workers=workers)
+        logger.info(f"🧵 Decoding CRCON responses in {workers} {pool} worker(s)")
+    return _parse_executor
+
+def shutdown_parse_executor():
+    global _parse_executor
+    if _parse_executor is not None:
+        _parse_executor.shutdown(wait=False)
+        _parse_executor = None
+
+async def decode_off_loop(decode, body):
+    """Run `decode(body)` in the parse workers if enabled and the body is large"""
+    executor = parse_executor()
+    if executor is None or len(body) < PARSE_OFFLOAD_BYTES:
+        return decode(body)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(executor, decode, body)
+    except BrokenExecutor:
+        logger.warning("CRCON parse workers died, starting new ones")
+        shutdown_parse_executor()
+        return decode(body)
+
 class APIKeyCRCONClient:
     """CRCON client using API key authentication"""
     
-    def __init__(self):
-        self.base_url = os.getenv('CRCON_URL', 'http://localhost:8010')
-        self.api_key = os.getenv('CRCON_API_KEY')
+    def __init__(self, base_url=None, api_key=None, server=None):
+        self.server = server  # Profile name, for per-server settings
+        self.base_url = base_url or server_env(server, 'CRCON_URL', 'http://localhost:8010')
+        self.api_key = api_key if api_key is not None else server_env(server, 'CRCON_API_KEY')
         self.session = None
-        self.timeout = aiohttp.ClientTimeout(total=int(os.getenv('CRCON_TIMEOUT', '15')))
+        self.timeout = aiohttp.ClientTimeout(total=int(server_env(server, 'CRCON_TIMEOUT', '15')))
+        self.verified = False  # API key checked against /api/get_status on this session
+        self.breaker = crcon_breaker(self.base_url)
+        # Minimum seconds between fetches of the slower endpoints
+        self.poll_intervals = {
+            '/api/get_detailed_players': int(server_env(server, 'CRCON_PLAYERS_INTERVAL', '30')),
+            '/api/get_map': int(server_env(server, 'CRCON_MAP_INTERVAL', '300'))  # Fallback if get_gamestate has no map
+        }
+        # Responses younger than this are shared instead of refetched
+        self.cache_ttl = float(server_env(server, 'CRCON_CACHE_TTL', '3'))
+        self._latest = {}  # Last good response per endpoint
+        self._fetched_at = {}
+        self._inflight = {}  # endpoint -> fetch in progress, shared by concurrent readers
+        # Endpoints decoded into parsed structures instead of plain JSON
+        self.decoders = {'/api/get_detailed_players': decode_detailed_players}
+        self._map_key_seen = None
+        self.message_concurrency = max(1, int(server_env(server, 'CRCON_MESSAGE_CONCURRENCY', '20')))
+        self.message_timeout = aiohttp.ClientTimeout(total=float(server_env(server, 'CRCON_MESSAGE_TIMEOUT', '5')))
+        # 'auto' tries one server-wide message first, 'players' always messages players one by one
+        self.broadcast_mode = server_env(server, 'CRCON_BROADCAST_MODE', 'auto').lower()
+        self.server_broadcast = None  # Whether /api/message_all_players works; None until tried on this session
+        self._connect_lock = asyncio.Lock()
+
+    async def connect(self):
+        """Open the keep-alive session and verify the API key, once per session"""
+        async with self._connect_lock:
+            if self.session is None or self.session.closed:
+                headers = {
+                    'Authorization': f'Bearer {self.api_key}',
+                    'Content-Type': 'application/json',
+                    'Accept': 'application/json'
+                }
+                connector = aiohttp.TCPConnector(
+                    limit=int(server_env(self.server, 'CRCON_POOL_SIZE', '20')),
+                    keepalive_timeout=int(server_env(self.server, 'CRCON_KEEPALIVE', '60')),
+                    ttl_dns_cache=300
+                )
+                self.session = aiohttp.ClientSession(
+                    timeout=self.timeout,
+                    headers=headers,
+                    connector=connector
+                )
+                self.verified = False
+                self.server_broadcast = None  # The server may have been upgraded
+
+            if not self.verified:
+                # Test connection
+                async with self.session.get(f"{self.base_url}/api/get_status") as response:
+                    if response.status != 200:
+                        raise Exception(f"CRCON connection failed: {response.status}")
+                self.verified = True
+                logger.info("Successfully connected to CRCON with API key")
+
+        return self
+
+    async def close(self):
+        """Close the session and its pooled connections"""
+        if self.session:
+            await self.session.close()
+        self.verified = False
     
     async def __aenter__(self):
         """Async context manager entry"""
-        headers = {
-            'Authorization': f'Bearer {self.api_key}',
-            'Content-Type': 'application/json',
-            'Accept': 'application/json'
-        }
-        
-        self.session = aiohttp.ClientSession(
-            timeout=self.timeout,
-            headers=headers
-        )
-        
-        # Test connection
         try:
-            async with self.session.get(f"{self.base_url}/api/get_status") as response:
-                if response.status != 200:
-                    await self.session.close()
-                    raise Exception(f"CRCON connection failed: {response.status}")
-        except Exception as e:
-            if self.session:
-                await self.session.close()
-            raise e
-        
-        logger.info("Successfully connected to CRCON with API key")
-        return self
+            return await self.connect()
+        except Exception:
+            await self.close()
+            raise
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit"""
-        if self.session:
-            await self.session.close()
+        await self.close()
     
     async def get_live_game_state(self):
-        """Get comprehensive live game state"""
+        """Get comprehensive live game state, polling each endpoint on its own cadence.
+
+        get_gamestate is refetched once its response is older than CRCON_CACHE_TTL,
+        get_detailed_players every CRCON_PLAYERS_INTERVAL seconds and get_map only
+        when the game state reports a different map. Fresh responses are shared by
+        every caller, and endpoints that fail are served from the last good response.
+        """
+        if not self.breaker.allow():
+            return None
+
         try:
             # Get data concurrently
-            tasks = [
-                self._get_endpoint('/api/get_gamestate'),
-                self._get_endpoint('/api/get_team_view'),
-                self._get_endpoint('/api/get_map'),
-                self._get_endpoint('/api/get_players'),
-                self._get_endpoint('/api/get_detailed_players')  # Detailed player info with combat scores
-            ]
-
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            # Process results safely
-            game_state = results[0] if not isinstance(results[0], Exception) else {}
-            team_view = results[1] if not isinstance(results[1], Exception) else {}
-            map_info = results[2] if not isinstance(results[2], Exception) else {}
-            players = results[3] if not isinstance(results[3], Exception) else {}
-            detailed_players = results[4] if not isinstance(results[4], Exception) else {}
+            game_state, _ = await asyncio.gather(
+                self._read('/api/get_gamestate', self.cache_ttl),
+                self._read('/api/get_detailed_players')  # Detailed player info with combat scores
+            )
+            if not game_state:
+                # Don't hand out an empty state - callers keep their last good snapshot
+                self.breaker.record_failure()
+                return None
+            self.breaker.record_success()
+
+            # The map rarely changes - only refetch it when the game state says it did
+            map_key = self._map_key(game_state)
+            if map_key != self._map_key_seen:
+                if await self._read('/api/get_map', self.cache_ttl):
+                    self._map_key_seen = map_key
+            elif map_key is None:
+                await self._read('/api/get_map')
 
             return {
                 'game_state': game_state,
-                'team_view': team_view,
-                'map_info': map_info,
-                'players': players,
-                'detailed_players': detailed_players,
+                'map_info': self._latest.get('/api/get_map', {}),
+                'detailed_players': self._latest.get('/api/get_detailed_players', {}),
                 'timestamp': datetime.datetime.now(timezone.utc)
             }
 
+        except asyncio.CancelledError:
+            # CancelledError isn't an Exception - don't leave a half-open probe claimed forever
+            self.breaker.release_probe()
+            raise
         except Exception as e:
             logger.error(f"Error getting game state: {e}")
+            self.breaker.record_failure()
             return None
+
+    async def _read(self, endpoint, max_age=None):
+        """Read-through cache for an endpoint.
+
+        Responses younger than `max_age` (default: the endpoint's polling interval)
+        are returned from the cache, and concurrent reads of a stale endpoint share
+        a single request. Returns {} if the fetch fails.
+        """
+        if max_age is None:
+            max_age = max(self.poll_intervals.get(endpoint, 0), self.cache_ttl)
+
+        fetched_at = self._fetched_at.get(endpoint)
+        if fetched_at is not None and time.monotonic() - fetched_at < max_age:
+            return self._latest[endpoint]
+
+        inflight = self._inflight.get(endpoint)
+        if inflight is None:
+            inflight = asyncio.ensure_future(self._fetch(endpoint))
+            self._inflight[endpoint] = inflight
+            inflight.add_done_callback(lambda _: self._inflight.pop(endpoint, None))
+
+        # Shielded so one cancelled caller doesn't cancel the fetch for the others
+        return await asyncio.shield(inflight)
+
+    async def _fetch(self, endpoint):
+        requested_at = time.monotonic()
+        data = await self._get_endpoint(endpoint, self.decoders.get(endpoint))
+        if data:
+            self._latest[endpoint] = data
+            self._fetched_at[endpoint] = requested_at
+        return data
+
+    @staticmethod
+    def _map_key(game_state):
+        """Identify the current map from a get_gamestate response, if it reports one"""
+        if isinstance(game_state, dict) and isinstance(game_state.get('result'), dict):
+            current_map = game_state['result'].get('current_map')
+            if isinstance(current_map, dict):
+                return current_map.get('id') or current_map.get('pretty_name') or current_map.get('name')
+            if current_map:
+                return str(current_map)
+        return None
     
-    async def _get_endpoint(self, endpoint):
-        """Helper to get data from an endpoint"""
+    async def _get_endpoint(self, endpoint, decode=None):
+        """Helper to get data from an endpoint, decoded with `decode` (default: plain JSON)"""
+        endpoint_label = endpoint.split('?', 1)[0]
+        started = time.perf_counter()
         try:
             async with self.session.get(f"{self.base_url}{endpoint}") as response:
                 if response.status == 200:
-                    return await response.json()
+                    return await decode_off_loop(decode or json_loads, await response.read())
                 else:
                     logger.warning(f"Endpoint {endpoint} returned {response.status}")
+                    metrics.inc('hll_crcon_request_errors_total', endpoint=endpoint_label)
                     return {}
         except Exception as e:
             logger.error(f"Error getting {endpoint}: {e}")
+            metrics.inc('hll_crcon_request_errors_total', endpoint=endpoint_label)
             return {}
+        finally:
+            metrics.observe('hll_crcon_request_seconds', time.perf_counter() - started, endpoint=endpoint_label)
     
     async def send_message(self, message: str):
-        """Send message to all players individually"""
+        """Send message to all players"""
+        result = await self.broadcast_message(message)
+        if result['error']:
+            return False
+        return result['mode'] == 'server' or result['total'] == 0 or result['sent'] > 0
+
+    async def _message_all_players(self, message):
+        """Try a single server-wide message. Returns True if CRCON delivered it.
+
+        A 404/405 means this CRCON version has no such endpoint, which is
+        remembered for the rest of the session; other failures are not.
+        """
         try:
-            # First get all connected players - UPDATED ENDPOINT
-            logger.info(f"Getting player list to send message: {message}")
-            
-            # FIXED: Using correct endpoint with underscore
-            async with self.session.get(f"{self.base_url}/api/get_player_ids") as response:
+            async with self.session.post(f"{self.base_url}/api/message_all_players", json={"message": message},
+                                         timeout=self.message_timeout) as response:
+                if response.status in (404, 405):
+                    logger.info("CRCON has no server-wide message endpoint, messaging players individually")
+                    self.server_broadcast = False
+                    return False
                 if response.status != 200:
-                    logger.warning(f"Failed to get player list: {response.status}")
+                    logger.warning(f"Server-wide message returned {response.status}, messaging players individually")
+                    return False
+                data = json_loads(await response.read())
+                if isinstance(data, dict) and data.get('failed'):
+                    logger.warning(f"Server-wide message failed: {data.get('error')}, messaging players individually")
                     return False
-                
-                player_data = await response.json()
-                logger.info(f"Player data response: {player_data}")
-                
-                # Extract player list from the result
-                if isinstance(player_data, dict) and 'result' in player_data:
-                    players = player_data['result']
-                else:
-                    players = player_data
-                
-                if not players:
-                    logger.info("No players online to send message to")
-                    return True
-                
-                success_count = 0
-                total_players = len(players)
-                
-                # Send message to each player individually
-                for player in players:
-                    try:
-                        # Handle both list format [name, id] and dict format
-                        if isinstance(player, list) and len(player) >= 2:
-                            player_name = player[0]
-                            player_id = player[1]
-                        elif isinstance(player, dict):
-                            player_name = player.get('name', '')
-                            player_id = player.get('steam_id_64', '')
-                        else:
-                            continue
-                        
-                        # Send individual message
-                        payload = {
-                            "player_name": player_name,
-                            "player_id": player_id,
-                            "message": message,
-                            "by": os.getenv('BOT_NAME', 'HLLTankBot')
-                        }
-                        
-                        async with self.session.post(f"{self.base_url}/api/message_player", json=payload) as msg_response:
-                            if msg_response.status == 200:
-                                success_count += 1
-                                logger.debug(f"Message sent to {player_name}")
-                            else:
-                                logger.debug(f"Failed to message {player_name}: {msg_response.status}")
-                                
-                    except Exception as e:
-                        logger.debug(f"Error messaging individual player: {e}")
-                        continue
-                
-                logger.info(f"Message sent to {success_count}/{total_players} players")
-                return success_count > 0
-                
         except Exception as e:
-            logger.error(f"Error sending message to all players: {e}")
+            logger.warning(f"Error sending server-wide message: {e}, messaging players individually")
             return False
 
+        if self.server_broadcast is None:
+            logger.info("CRCON supports server-wide messages")
+        self.server_broadcast = True
+        return True
+
+    async def _get_message_targets(self):
+        """Get (name, id) pairs for every connected player"""
+        async with self.session.get(f"{self.base_url}/api/get_player_ids") as response:
+            if response.status != 200:
+                raise Exception(f"Failed to get player list: {response.status}")
+            player_data = await response.json()
+
+        # Extract player list from the result
+        if isinstance(player_data, dict) and 'result' in player_data:
+            players = player_data['result']
+        else:
+            players = player_data
+
+        targets = []
+        for player in players or []:
+            # Handle both list format [name, id] and dict format
+            if isinstance(player, list) and len(player) >= 2:
+                targets.append((player[0], player[1]))
+            elif isinstance(player, dict):
+                targets.append((player.get('name', ''), player.get('steam_id_64', '')))
+        crcon_logger.debug("get_player_ids returned %d players", len(targets))
+        return targets
+
+    async def broadcast_message(self, message: str, concurrency=None, progress=None):
+        """Message every player, with one server-wide request if CRCON supports it.
+
+        Otherwise each player is messaged concurrently, at most `concurrency`
+        requests in flight, and `progress(done, total)` is called as each delivery
+        finishes. Returns a summary dict with the mode used ('server' or 'players'),
+        total/sent/failed player counts, elapsed seconds and error.
+        """
+        concurrency = concurrency or self.message_concurrency
+        summary = {'mode': 'players', 'total': 0, 'sent': 0, 'failed': 0, 'elapsed': 0.0, 'error': None}
+        started = time.monotonic()
+
+        if self.broadcast_mode != 'players' and self.server_broadcast is not False:
+            if await self._message_all_players(message):
+                summary['mode'] = 'server'
+                summary['elapsed'] = time.monotonic() - started
+                metrics.observe('hll_broadcast_seconds', summary['elapsed'])
+                metrics.inc('hll_broadcast_messages_total', result='server')
+                logger.info(f"Message sent server-wide in {summary['elapsed']:.2f}s")
+                return summary
+
+        try:
+            crcon_logger.debug("Getting player list to send message: %s", message)
+            targets = await self._get_message_targets()
+        except Exception as e:
+            logger.warning(f"Error sending message to all players: {e}")
+            summary['error'] = str(e)
+            return summary
+
+        summary['total'] = len(targets)
+        if not targets:
+            logger.info("No players online to send message to")
+            return summary
+
+        semaphore = asyncio.Semaphore(concurrency)
+        sender = os.getenv('BOT_NAME', 'HLLTankBot')
+
+        async def deliver(player_name, player_id):
+            payload = {
+                "player_name": player_name,
+                "player_id": player_id,
+                "message": message,
+                "by": sender
+            }
+            async with semaphore:
+                try:
+                    async with self.session.post(f"{self.base_url}/api/message_player", json=payload,
+                                                 timeout=self.message_timeout) as msg_response:
+                        delivered = msg_response.status == 200
+                        if not delivered:
+                            crcon_logger.debug("Failed to message %s: %s", player_name, msg_response.status)
+                except Exception as e:
+                    delivered = False
+                    crcon_logger.debug("Error messaging %s: %s", player_name, e)
+
+            summary['sent' if delivered else 'failed'] += 1
+            if progress:
+                progress(summary['sent'] + summary['failed'], summary['total'])
+
+        await asyncio.gather(*(deliver(name, player_id) for name, player_id in targets))
+
+        summary['elapsed'] = time.monotonic() - started
+        metrics.observe('hll_broadcast_seconds', summary['elapsed'])
+        metrics.inc('hll_broadcast_messages_total', summary['sent'], result='sent')
+        metrics.inc('hll_broadcast_messages_total', summary['failed'], result='failed')
+        logger.info(f"Message sent to {summary['sent']}/{summary['total']} players in {summary['elapsed']:.2f}s")
+        return summary
+
+def _log_lines_after(lines, cursor):
+    """Return the lines newer than `cursor` in time order, plus the advanced cursor.
+
+    The cursor is (timestamp_ms, raw lines already seen at that timestamp), so
+    lines sharing the newest timestamp are not replayed on the next fetch.
+    """
+    last_ts, seen = cursor if cursor else (-1, frozenset())
+    fresh = []
+    for line in sorted(lines, key=lambda l: l.get('timestamp_ms', 0)):
+        ts = line.get('timestamp_ms', 0)
+        raw = line.get('raw') or line.get('message', '')
+        if ts > last_ts or (ts == last_ts and raw not in seen):
+            fresh.append(line)
+
+    if fresh:
+        newest = fresh[-1].get('timestamp_ms', 0)
+        at_newest = {l.get('raw') or l.get('message', '') for l in fresh if l.get('timestamp_ms', 0) == newest}
+        if newest == last_ts:
+            at_newest |= seen
+        cursor = (newest, frozenset(at_newest))
+    return fresh, cursor
+
+class CRCONLogSource:
+    """Tails CRCON's recent log lines, only returning lines past the cursor"""
+
+    def __init__(self, client, window=200):
+        self.client = client
+        self.window = window  # Lines requested per poll
+
+    async def fetch(self, cursor):
+        endpoint = f"/api/get_recent_logs?end={self.window}"
+        if cursor:
+            endpoint += f"&min_timestamp={cursor[0] / 1000:.3f}"
+
+        # Share the host's circuit breaker so a down CRCON isn't polled every interval
+        breaker = self.client.breaker
+        if not breaker.allow():
+            raise CRCONUnavailable(f"CRCON at {breaker.host} is unreachable, retrying in {breaker.retry_in()}s")
+        try:
+            data = await self.client._get_endpoint(endpoint)
+        except asyncio.CancelledError:
+            breaker.release_probe()
+            raise
+        if not data:
+            # _get_endpoint answers {} for errors and non-200 responses
+            breaker.record_failure()
+            return [], cursor
+        breaker.record_success()
+
+        result = data.get('result', data) if isinstance(data, dict) else data
+        lines = result.get('logs', []) if isinstance(result, dict) else result
+        return _log_lines_after([l for l in lines or [] if isinstance(l, dict)], cursor)
+
+class FakeLogSource:
+    """In-memory log source for trying log-driven auto-switch locally"""
+
+    def __init__(self):
+        self.lines = []
+
+    def push(self, raw, timestamp_ms=None):
+        if timestamp_ms is None:
+            timestamp_ms = int(time.time() * 1000)
+        self.lines.append({'timestamp_ms': timestamp_ms, 'raw': raw})
+
+    async def fetch(self, cursor):
+        return _log_lines_after(self.lines, cursor)
+
+class CaptureLogWatcher:
+    """Polls a log source and auto-switches a clock as soon as a capture line shows up"""
+
+    # Override with CRCON_CAPTURE_PATTERN; the `team` group names the capturing side.
+    # Matched from the start of the line (after any "[12:34 min (123)]" prefix) so a
+    # team name quoted later in a line can't trigger it.
+    DEFAULT_PATTERN = r"(?i)^(?P<team>allies|allied|axis)\b[^:]*\bcaptured?\b"
+
+    # Lines written by or about players are never capture events, whatever they say
+    PLAYER_ACTIONS = ('CHAT', 'KILL', 'TEAM KILL', 'MESSAGE', 'VOTE', 'CONNECTED', 'DISCONNECTED',
+                      'TEAMSWITCH', 'CAMERA', 'ADMIN')
+    TIME_PREFIX = re.compile(r"^\[[^\]]*\]\s*")
+
+    def __init__(self, clock, source, interval=None, pattern=None):
+        self.clock = clock
+        self.source = source
+        self.interval = interval or float(server_env(clock.server, 'CRCON_LOG_POLL_INTERVAL', '1'))
+        self.pattern = re.compile(pattern or server_env(clock.server, 'CRCON_CAPTURE_PATTERN') or self.DEFAULT_PATTERN)
+        self._task = None
+        self._cursor = None
+        self._primed = False  # The first fetch only positions the cursor past old lines
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+    def parse_capture(self, line):
+        """Return 'A' or 'B' if the log line is a capture, else None"""
+        text = self.TIME_PREFIX.sub('', line.get('line_without_time') or line.get('raw') or line.get('message', ''))
+        action = (line.get('action') or text).upper()
+        if action.startswith(self.PLAYER_ACTIONS):
+            return None
+        match = self.pattern.search(text)
+        if not match:
+            return None
+        return 'A' if match.group('team').lower().startswith('all') else 'B'
+
+    async def poll(self):
+        """Read the source once and switch on any capture lines past the cursor"""
+        lines, self._cursor = await self.source.fetch(self._cursor)
+        for line in lines if self._primed else []:
+            team = self.parse_capture(line)
+            if team and self.clock.auto_switch and self.clock.started:
+                side = 'Allies' if team == 'A' else 'Axis'
+                logger.info(f"Capture in log stream: {line.get('raw') or line.get('message')}")
+                await self.clock._auto_switch_to(team, f"{side} captured the center point")
+        self._primed = True
+
+    async def _run(self):
+        while self.clock.started:
+            try:
+                await self.poll()
+            except CRCONUnavailable as e:
+                logger.debug(f"Skipping log stream poll: {e}")
+            except Exception as e:
+                logger.warning(f"Error reading CRCON log stream: {e}")
+            await asyncio.sleep(self.interval)
+
+# Shared CRCON clients keyed by (url, api_key), reused by every clock and command
+_crcon_clients = {}
+
+def channel_server(channel_id):
+    """The CRCON server profile a channel's clock is using, if it has one"""
+    clock = clocks.get(channel_id)
+    return clock.server if clock else None
+
+async def get_crcon_client(server=None):
+    """Get the shared keep-alive client for a CRCON server profile, connecting it if needed"""
+    server, base_url, api_key = crcon_server(server)
+
+    client = _crcon_clients.get((base_url, api_key))
+    if client is None:
+        client = APIKeyCRCONClient(base_url, api_key, server)
+        _crcon_clients[(base_url, api_key)] = client
+
+    if client.verified and not client.session.closed:
+        return client
+
+    breaker = client.breaker
+    if not breaker.allow():
+        raise CRCONUnavailable(f"CRCON at {breaker.host} is unreachable, retrying in {breaker.retry_in()}s")
+    try:
+        await client.connect()
+    except asyncio.CancelledError:
+        breaker.release_probe()
+        raise
+    except Exception:
+        breaker.record_failure()
+        raise
+    breaker.record_success()
+    return client
+
+async def close_crcon_clients():
+    """Close every shared CRCON client (used on shutdown)"""
+    for client in list(_crcon_clients.values()):
+        try:
+            await client.close()
+        except Exception as e:
+            logger.warning(f"Error closing CRCON client: {e}")
+    _crcon_clients.clear()
+
+class PlayerScore(NamedTuple):
+    """One player's combat score from get_detailed_players"""
+    team: str           # 'allied' or 'axis'
+    squad: str          # Lowercased unit name
+    name: str
+    combat_score: int
+
+class GameSnapshot(NamedTuple):
+    """Immutable, parsed view of one get_live_game_state result"""
+    map_name: str
+    allied_players: int
+    axis_players: int
+    player_count: int
+    time_remaining: int
+    allied_score: int
+    axis_score: int
+    players: tuple      # PlayerScore entries
+    timestamp: object
+
+class DetailedPlayers(NamedTuple):
+    """A get_detailed_players response already decoded into PlayerScore entries"""
+    players: tuple      # PlayerScore entries
+    count: int          # Players in the response, including any without a team
+
+    def to_dict(self):
+        """Equivalent players-by-id document, for recordings"""
+        return {'result': {'players': {
+            str(i): {
+                'name': p.name,
+                'team': 'allies' if p.team == 'allied' else 'axis',
+                'unit_name': p.squad,
+                'combat': p.combat_score
+            }
+            for i, p in enumerate(self.players)
+        }}}
+
+def _unwrap_result(data):
+    """Return the 'result' dict of a CRCON response, or None"""
+    if isinstance(data, dict):
+        result = data.get('result')
+        if isinstance(result, dict):
+            return result
+    return None
+
+def _player_score(player_data, squad_name, team_key):
+    """Build a PlayerScore from one player's data"""
+    player_name = player_data.get('player', player_data.get('name', 'Unknown'))
+
+    # Case-insensitive lookup for combat score
+    combat_score = player_data.get('combat')
+    if combat_score is None:
+        combat_score = 0
+        for key in player_data:
+            if key.lower() in ('combat', 'combat_score', 'combatscore'):
+                combat_score = player_data[key]
+                break
+
+    # Normalize squad name to lowercase for case-insensitive matching
+    squad_name_lower = squad_name.lower() if squad_name else 'unknown'
+    return PlayerScore(team_key, squad_name_lower, player_name, combat_score)
+
+def _process_team_scores(team_data, team_key, out):
+    """Collect one team's player scores into `out`"""
+    # Handle list of players directly
+    if isinstance(team_data, list):
+        for player in team_data:
+            if isinstance(player, dict):
+                # Get squad/unit name from player data
+                squad_name = player.get('unit_name', player.get('unit', player.get('squad', 'Unknown')))
+                out.append(_player_score(player, squad_name, team_key))
+        return
+
+    # Handle dict format
+    if not isinstance(team_data, dict):
+        return
+
+    # Team data might have 'players' or 'squads' key
+    players = team_data.get('players', [])
+    squads = team_data.get('squads', {})
+
+    # If we have squad data organized by squad
+    if squads and isinstance(squads, dict):
+        for squad_name, squad_info in squads.items():
+            if isinstance(squad_info, dict) and 'players' in squad_info:
+                squad_players = squad_info['players']
+            elif isinstance(squad_info, list):
+                # Squad info is a list of players
+                squad_players = squad_info
+            else:
+                continue
+            for player in squad_players:
+                if isinstance(player, dict):
+                    out.append(_player_score(player, squad_name, team_key))
+
+    # If we have flat player list with squad info
+    elif players and isinstance(players, list):
+        for player in players:
+            if isinstance(player, dict):
+                squad_name = player.get('unit_name', player.get('unit', player.get('squad', 'Unknown')))
+                out.append(_player_score(player, squad_name, team_key))
+
+def parse_detailed_players(detailed_players):
+    """Extract PlayerScore entries from any get_detailed_players payload shape"""
+    if isinstance(detailed_players, DetailedPlayers):
+        return detailed_players.players
+
+    out = []
+    result = _unwrap_result(detailed_players)
+
+    if result is not None:
+        # Process players - handle format where players are keyed by player_id
+        if 'players' in result:
+            players_data = result['players']
+
+            # Check if players are keyed by player_id (dict format)
+            if isinstance(players_data, dict):
+                # Check if it looks like player_id keys (not 'allied'/'axis' keys)
+                first_key = next(iter(players_data), None)
+                if first_key and first_key not in ('allied', 'axis', 'allies'):
+                    # Players keyed by player_id - iterate and organize by team
+                    for player_data in players_data.values():
+                        if not isinstance(player_data, dict):
+                            continue
+                        # Get team - normalize "allies" to "allied"
+                        team = player_data.get('team', '')
+                        if team == 'allies':
+                            team_key = 'allied'
+                        elif team == 'axis':
+                            team_key = 'axis'
+                        else:
+                            continue  # Skip if no valid team
+
+                        # Get squad/unit name
+                        squad_name = player_data.get('unit_name', player_data.get('unit', 'Unknown'))
+                        out.append(_player_score(player_data, squad_name, team_key))
+                else:
+                    # Players organized by team
+                    _process_team_scores(players_data.get('allied', []), 'allied', out)
+                    _process_team_scores(players_data.get('axis', []), 'axis', out)
+        # Or direct allied/axis keys
+        elif 'allied' in result or 'axis' in result:
+            _process_team_scores(result.get('allied', []), 'allied', out)
+            _process_team_scores(result.get('axis', []), 'axis', out)
+    # Handle direct list format
+    elif isinstance(detailed_players, dict) and ('allied' in detailed_players or 'axis' in detailed_players):
+        _process_team_scores(detailed_players.get('allied', []), 'allied', out)
+        _process_team_scores(detailed_players.get('axis', []), 'axis', out)
+
+    return tuple(out)
+
+TEAM_KEYS = ('allied', 'axis', 'allies')
+
+if msgspec is not None:
+    # Only the fields scoring uses - the rest of each player entry is skipped while decoding
+    class _DetailedPlayer(msgspec.Struct):
+        team: Optional[str] = None
+        unit_name: Optional[str] = None
+        unit: Optional[str] = None
+        name: Optional[str] = None
+        player: Optional[str] = None
+        combat: Union[int, float, None] = None
+
+    class _DetailedPlayersResult(msgspec.Struct):
+        players: Dict[str, _DetailedPlayer]
+
+    class _DetailedPlayersResponse(msgspec.Struct):
+        result: _DetailedPlayersResult
+
+    _detailed_players_decoder = msgspec.json.Decoder(_DetailedPlayersResponse)
+else:
+    _detailed_players_decoder = None
+
+def _decode_players_by_id(body):
+    """Typed decode of the usual players-by-id response, or None if it has another shape"""
+    try:
+        players = _detailed_players_decoder.decode(body).result.players
+    except msgspec.ValidationError:
+        return None
+    if next(iter(players), None) in TEAM_KEYS:
+        return None
+
+    out = []
+    for player in players.values():
+        if player.combat is None:
+            return None  # Combat under another key name - let the generic parser find it
+        if player.team == 'allies':
+            team_key = 'allied'
+        elif player.team == 'axis':
+            team_key = 'axis'
+        else:
+            continue
+        squad_name = player.unit_name if player.unit_name is not None else (player.unit or 'Unknown')
+        player_name = player.player or player.name or 'Unknown'
+        out.append(PlayerScore(team_key, squad_name.lower() if squad_name else 'unknown', player_name, player.combat))
+    return DetailedPlayers(tuple(out), len(players))
+
+def decode_detailed_players(body):
+    """Decode a get_detailed_players response body straight into a DetailedPlayers.
+
+    With msgspec installed the usual players-by-id shape is decoded into typed
+    structs holding only the fields scoring uses; anything else is decoded as
+    plain JSON and parsed once here rather than on every tick.
+    """
+    if _detailed_players_decoder is not None:
+        decoded = _decode_players_by_id(body)
+        if decoded is not None:
+            return decoded
+
+    data = json_loads(body)
+    result = _unwrap_result(data)
+    count = len(result['players']) if result is not None and isinstance(result.get('players'), dict) else 0
+    return DetailedPlayers(parse_detailed_players(data), count)
+
+def parse_game_snapshot(live_data):
+    """Parse a get_live_game_state result into a GameSnapshot in a single pass"""
+    game_state = _unwrap_result(live_data.get('game_state')) or {}
+    map_result = _unwrap_result(live_data.get('map_info'))
+    detailed_players = live_data.get('detailed_players', {})
+
+    # Extract map name - try the pretty_name first (e.g. "Elsenborn Ridge Warfare")
+    map_name = 'Unknown'
+    if map_result is not None:
+        if 'pretty_name' in map_result:
+            map_name = map_result['pretty_name']
+        # Fallback to nested map object
+        elif isinstance(map_result.get('map'), dict):
+            map_name = map_result['map'].get('pretty_name', map_result['map'].get('name', 'Unknown'))
+
+    allied_players = game_state.get('num_allied_players', 0)
+    axis_players = game_state.get('num_axis_players', 0)
+    player_count = allied_players + axis_players
+
+    # Fallback: If game_state returns 0 players, count from detailed_players
+    if player_count == 0:
+        if isinstance(detailed_players, DetailedPlayers):
+            player_count = detailed_players.count
+        else:
+            detailed_result = _unwrap_result(detailed_players)
+            if detailed_result is not None and isinstance(detailed_result.get('players'), dict):
+                player_count = len(detailed_result['players'])
+
+    time_remaining = game_state.get('time_remaining', 0)
+
+    return GameSnapshot(
+        map_name=map_name,
+        allied_players=allied_players,
+        axis_players=axis_players,
+        player_count=player_count,
+        time_remaining=time_remaining if time_remaining > 0 else 0,
+        allied_score=game_state.get('allied_score', 0),
+        axis_score=game_state.get('axis_score', 0),
+        players=parse_detailed_players(detailed_players),
+        timestamp=live_data.get('timestamp')
+    )
+
+class DMTScoreEngine:
+    """Tracks each squad's top combat score as players are added and caches combat totals.
+
+    The combat part only changes when a new game-data snapshot is parsed, so it is
+    computed once per snapshot; the cap part depends on the clock and is added by
+    ClockState.calculate_dmt_score on demand.
+    """
+
+    COMMANDER_SQUADS = ('command', 'commander', 'cmd')
+
+    def __init__(self):
+        self.squad_highs = {'allied': {}, 'axis': {}}
+        self._combat = {}  # team -> cached combat breakdown for the current snapshot
+
+    def reset(self):
+        """Start a new snapshot"""
+        self.squad_highs = {'allied': {}, 'axis': {}}
+        self._combat = {}
+
+    def add(self, team_key, squad_name, combat_score):
+        """Record one player's combat score, keeping the squad maximum current"""
+        highs = self.squad_highs[team_key]
+        if squad_name not in highs or combat_score > highs[squad_name]:
+            highs[squad_name] = combat_score
+            self._combat.pop(team_key, None)
+
+    def combat(self, team_key):
+        """Get the combat breakdown for a team: 3 × (sum of squad highs) + commander"""
+        cached = self._combat.get(team_key)
+        if cached is not None:
+            return cached
+
+        # Count ALL squads, not just configured ones
+        crew_scores = []
+        commander_score = 0
+        for squad_name, highest_score in self.squad_highs.get(team_key, {}).items():
+            if squad_name in self.COMMANDER_SQUADS:
+                commander_score = highest_score
+            else:
+                crew_scores.append(highest_score)
+
+        combat_total = 3 * sum(crew_scores) + commander_score
+
+        # Debug logging to help diagnose score issues
+        tick_logger.debug("DMT Calc [%s]: %d squads found, highs=%s, commander=%s, combat_total=%s",
+                          team_key, len(crew_scores), crew_scores, commander_score, combat_total)
+
+        cached = {
+            'crew_scores': crew_scores,
+            'commander_score': commander_score,
+            'combat_total': combat_total
+        }
+        self._combat[team_key] = cached
+        return cached
+
+class TimelineSample(NamedTuple):
+    """One tick of a match as recorded by MatchTimeline"""
+    elapsed: float          # Seconds since the match started
+    time_remaining: int     # Server game time left
+    allied_score: int
+    axis_score: int
+    allied_players: int
+    axis_players: int
+    allied_combat: int      # DMT combat totals
+    axis_combat: int
+    control_a: float        # Control seconds including the running segment
+    control_b: float
+    active: str             # 'A', 'B' or '' before the first capture
+
+class MatchTimeline:
+    """Fixed-size ring buffer of per-tick match samples.
+
+    Each field is a typed array preallocated for `capacity` samples (by default
+    a full match at the fastest update interval, about 24 KiB), so recording
+    never allocates and the oldest samples are overwritten if a match overruns.
+    """
+
+    # Field -> array typecode, in TimelineSample order
+    COLUMNS = (
+        ('elapsed', 'f'),
+        ('time_remaining', 'H'),
+        ('allied_score', 'B'),
+        ('axis_score', 'B'),
+        ('allied_players', 'B'),
+        ('axis_players', 'B'),
+        ('allied_combat', 'I'),
+        ('axis_combat', 'I'),
+        ('control_a', 'f'),
+        ('control_b', 'f'),
+        ('active', 'B'),
+    )
+    LIMITS = {'H': 0xFFFF, 'B': 0xFF, 'I': 0xFFFFFFFF}
+    ACTIVE_CODES = {None: 0, 'A': 1, 'B': 2}
+    ACTIVE_NAMES = ('', 'A', 'B')
+
+    def __init__(self, capacity=None):
+        self.capacity = capacity or DEFAULT_MATCH_DURATION // MIN_UPDATE_INTERVAL
+        self._columns = [array(code, [0]) * self.capacity for _, code in self.COLUMNS]
+        self._next = 0  # Slot the next sample goes into
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def nbytes(self):
+        return sum(column.itemsize * len(column) for column in self._columns)
+
+    def clear(self):
+        self._next = 0
+        self.count = 0
+
+    def record(self, elapsed, snapshot, combat, control_a, control_b, active):
+        """Store one sample; `combat` maps 'allied'/'axis' to combat totals"""
+        values = (
+            elapsed,
+            snapshot.time_remaining,
+            snapshot.allied_score,
+            snapshot.axis_score,
+            snapshot.allied_players,
+            snapshot.axis_players,
+            combat.get('allied', 0),
+            combat.get('axis', 0),
+            control_a,
+            control_b,
+            self.ACTIVE_CODES.get(active, 0),
+        )
+        slot = self._next
+        for column, (_, code), value in zip(self._columns, self.COLUMNS, values):
+            if code in self.LIMITS:
+                value = min(max(int(value), 0), self.LIMITS[code])
+            column[slot] = value
+
+        self._next = (slot + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def _order(self):
+        """Slot indices from oldest to newest"""
+        start = (self._next - self.count) % self.capacity
+        return [(start + i) % self.capacity for i in range(self.count)]
+
+    def _sample(self, slot):
+        values = [column[slot] for column in self._columns]
+        values[-1] = self.ACTIVE_NAMES[values[-1]]
+        return TimelineSample(*values)
+
+    def column(self, name):
+        """All recorded values of one field, oldest first"""
+        index = [field for field, _ in self.COLUMNS].index(name)
+        values = [self._columns[index][slot] for slot in self._order()]
+        if name == 'active':
+            return [self.ACTIVE_NAMES[value] for value in values]
+        return values
+
+    def samples(self):
+        """Recorded samples, oldest first"""
+        for slot in self._order():
+            yield self._sample(slot)
+
+    def latest(self):
+        """The newest sample, or None if nothing was recorded"""
+        if not self.count:
+            return None
+        return self._sample((self._next - 1) % self.capacity)
+
+def _json_default(value):
+    """JSON encoder fallback for the datetimes kept in clock state"""
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def _parse_time(value):
+    return datetime.datetime.fromisoformat(value) if value else None
+
+def _utcnow():
+    return datetime.datetime.now(timezone.utc)
+
+class MatchJournal:
+    """Append-only journal of one clock's transitions, compacted into checkpoints.
+
+    Each record is one JSON line flushed straight to the OS, so a crash or
+    restart loses nothing that was recorded. Every `checkpoint_every` records
+    the full clock state is written atomically and the journal starts over.
+    """
+
+    def __init__(self, channel_id, directory=None):
+        self.channel_id = channel_id
+        self.directory = Path(directory or os.getenv('MATCH_DATA_DIR', 'match_data'))
+        self.journal_path = self.directory / f"clock_{channel_id}.jsonl"
+        self.checkpoint_path = self.directory / f"clock_{channel_id}.json"
+        self.checkpoint_every = max(1, int(os.getenv('JOURNAL_CHECKPOINT_EVERY', '50')))
+        self.seq = 0  # Sequence number of the last record written
+        self._records = 0  # Records since the last checkpoint
+        self._file = None
+
+    def append(self, event, **fields):
+        """Record one transition"""
+        self.seq += 1
+        record = {'seq': self.seq, 'event': event}
+        record.update(fields)
+        try:
+            if self._file is None:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.journal_path, 'a', encoding='utf-8')
+            self._file.write(json.dumps(record, default=_json_default) + '\n')
+            self._file.flush()
+            self._records += 1
+        except (OSError, TypeError) as e:
+            logger.warning(f"Could not write match journal for channel {self.channel_id}: {e}")
+
+    def checkpoint(self, clock):
+        """Write the full clock state and start a fresh journal"""
+        state = clock.to_checkpoint()
+        state['channel_id'] = self.channel_id
+        state['seq'] = self.seq
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.checkpoint_path.with_suffix('.tmp')
+            tmp_path.write_text(json.dumps(state, default=_json_default), encoding='utf-8')
+            os.replace(tmp_path, self.checkpoint_path)
+
+            # Records up to `seq` are in the checkpoint now
+            self._close_file()
+            if self.journal_path.exists():
+                self.journal_path.unlink()
+            self._records = 0
+        except (OSError, TypeError) as e:
+            logger.warning(f"Could not write match checkpoint for channel {self.channel_id}: {e}")
+
+    def maybe_checkpoint(self, clock):
+        if self._records >= self.checkpoint_every:
+            self.checkpoint(clock)
+
+    def discard(self):
+        """Delete the journal once the match is over"""
+        self._close_file()
+        for path in (self.journal_path, self.checkpoint_path):
+            try:
+                if path.exists():
+                    path.unlink()
+            except OSError as e:
+                logger.warning(f"Could not remove {path}: {e}")
+
+    def _close_file(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    @classmethod
+    def load_all(cls, directory=None):
+        """Rebuild the saved state of every journaled clock: [(channel_id, state, records)]"""
+        directory = Path(directory or os.getenv('MATCH_DATA_DIR', 'match_data'))
+        saved = []
+        for checkpoint_path in sorted(directory.glob('clock_*.json')):
+            try:
+                state = json.loads(checkpoint_path.read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable checkpoint {checkpoint_path}: {e}")
+                continue
+
+            records = []
+            journal_path = checkpoint_path.with_suffix('.jsonl')
+            if journal_path.exists():
+                with open(journal_path, encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            break  # Torn final write
+                        if record.get('seq', 0) > state.get('seq', 0):
+                            records.append(record)
+            saved.append((state['channel_id'], state, records))
+        return saved
+
+def gzip_segments(path):
+    """A match file plus the segments later bot restarts added to it, in order"""
+    path = Path(path)
+    stem = re.sub(r'(\.seg\d+)?\.jsonl\.gz$', '', path.name)
+    base = path.with_name(f"{stem}.jsonl.gz")
+    numbered = []
+    for segment in path.parent.glob(f"{glob.escape(stem)}.seg*.jsonl.gz"):
+        match = re.fullmatch(r'\.seg(\d+)\.jsonl\.gz', segment.name[len(stem):])
+        if match:
+            numbered.append((int(match.group(1)), segment))
+    return [base] + [segment for _, segment in sorted(numbered)]
+
+class GzipJsonLines:
+    """Writes one JSON record per line to a gzip file, flushing after each write.
+
+    A file left by a crashed bot has no gzip trailer and can't be appended to,
+    so each writer starts a new segment next to `path` if it already exists;
+    load_recording reads all segments back in order.
+    """
+
+    kind = 'match file'  # Named in write warnings
+
+    def __init__(self, channel_id, path):
+        self.channel_id = channel_id
+        self.path = Path(path)
+        self._file = None
+
+    def _open_segment(self):
+        segments = gzip_segments(self.path)
+        existing = [segment for segment in segments if segment.exists()]
+        if not existing:
+            return self.path
+        return self.path.with_name(f"{self.path.name[:-len('.jsonl.gz')]}.seg{len(segments)}.jsonl.gz")
+
+    def _write(self, kind, at, **fields):
+        record = {'type': kind, 'at': at}
+        record.update(fields)
+        try:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = gzip.open(self._open_segment(), 'wt', encoding='utf-8')
+            self._file.write(json.dumps(record, default=_json_default) + '\n')
+            self._file.flush()
+        except (OSError, TypeError) as e:
+            logger.warning(f"Could not write {self.kind} for channel {self.channel_id}: {e}")
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+class MatchRecorder(GzipJsonLines):
+    """Records everything a match's scoring depends on, for replay_match.
+
+    One gzipped JSON line per record: the clock state when recording began,
+    each journaled transition and each get_live_game_state result. Parts of the
+    live data that haven't changed since the previous record are left out.
+    A restarted bot continues in a new segment file (see GzipJsonLines).
+    """
+
+    LIVE_KEYS = ('game_state', 'map_info', 'detailed_players')
+    kind = 'match recording'
+
+    def __init__(self, channel_id, match_start_time, directory=None):
+        directory = Path(directory or os.getenv('MATCH_RECORD_DIR') or Path(os.getenv('MATCH_DATA_DIR', 'match_data')) / 'recordings')
+        super().__init__(channel_id, directory / f"match_{channel_id}_{match_start_time:%Y%m%d-%H%M%S}.jsonl.gz")
+        self._last = {}  # Live data part -> object last written
+
+    def write_state(self, clock):
+        self._write('state', clock._now(), state=clock.to_checkpoint(),
+                    capture_source=server_env(clock.server, 'CRCON_CAPTURE_SOURCE', 'score').lower())
+
+    def write_event(self, at, event, fields):
+        record = {'event': event}
+        record.update(fields)
+        self._write('event', at, record=record)
+
+    def write_live(self, at, live_data):
+        changed = {}
+        for key in self.LIVE_KEYS:
+            value = live_data.get(key)
+            if value is not self._last.get(key):
+                self._last[key] = value
+                changed[key] = value.to_dict() if isinstance(value, DetailedPlayers) else value
+        self._write('live', at, data=changed)
+
+class MatchReport(GzipJsonLines):
+    """Post-match report, written as the match runs.
+
+    One gzipped JSON line per record: a header with the teams and squad setup,
+    each switch as it happens and, per update, the player combat scores that
+    changed since the last one. finish() only has to add the control times and
+    DMT breakdown, so ending a match never serializes the whole report.
+    """
+
+    kind = 'match report'
+
+    def __init__(self, channel_id, match_start_time, directory=None):
+        directory = Path(directory or os.getenv('MATCH_REPORT_DIR', 'match_reports'))
+        super().__init__(channel_id, directory / f"match_{channel_id}_{match_start_time:%Y%m%d-%H%M%S}.jsonl.gz")
+        self._scores = {}  # (team, squad, name) -> combat score last written
+
+    def write_header(self, clock):
+        self._write('header', clock._now(), channel_id=self.channel_id, server=clock.server,
+                    match_start_time=clock.match_start_time, team_names=clock.team_names,
+                    squad_config=clock.squad_config)
+
+    def write_switch(self, switch_data, time_a, time_b):
+        self._write('switch', switch_data['timestamp'], switch=switch_data, time_a=time_a, time_b=time_b)
+
+    def write_scores(self, at, players):
+        changed = []
+        for player in players:
+            key = (player.team, player.squad, player.name)
+            if self._scores.get(key) != player.combat_score:
+                self._scores[key] = player.combat_score
+                changed.append(player)
+        if changed:
+            self._write('scores', at, players=changed)
+
+    def finish(self, clock, ctx, end_reason):
+        """Write the final result and close the report"""
+        self._write('final', ctx.now, end_reason=end_reason, map=ctx.game_info['map'],
+                    time_a=ctx.allies_status['total_time'], time_b=ctx.axis_status['total_time'],
+                    switches=ctx.switches, allied=ctx.allied_scores, axis=ctx.axis_scores,
+                    squad_highs=clock.dmt.squad_highs)
+        self.close()
+
+    def discard(self):
+        """Delete the report of a match that was reset or replaced before it finished"""
+        self.close()
+        for segment in gzip_segments(self.path):
+            try:
+                segment.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not remove match report {segment}: {e}")
+
+def load_report(path):
+    """Fold a match report, with any segments added after restarts, back into one dict:
+    header, switches, players by team and squad, final"""
+    report = {'header': None, 'switches': [], 'players': {'allied': {}, 'axis': {}}, 'final': None}
+    for record in load_recording(path):
+        if record['type'] == 'header':
+            report['header'] = report['header'] or record
+        elif record['type'] == 'switch':
+            report['switches'].append(record['switch'])
+        elif record['type'] == 'scores':
+            for team, squad, name, combat_score in record['players']:
+                report['players'].setdefault(team, {}).setdefault(squad, {})[name] = combat_score
+        elif record['type'] == 'final':
+            report['final'] = record
+    return report
+
+def load_recording(path):
+    """Yield the records of a match recording or report, across all its segments.
+
+    A segment cut short by a crash is read up to its last complete record.
+    """
+    for segment in gzip_segments(path):
+        if not segment.exists():
+            continue
+        with gzip.open(segment, 'rt', encoding='utf-8') as f:
+            try:
+                for line in f:
+                    yield json.loads(line)
+            except (EOFError, ValueError, zlib.error, OSError):
+                continue
+
+async def replay_match(path):
+    """Recompute a recorded match offline and return its result.
+
+    Live data goes through the same ClockState code as a running match, with the
+    clock's time taken from the recording, so nothing waits in real time. Score
+    based auto-switches are recomputed rather than copied from the recording;
+    manual switches and log-stream captures are re-applied at their recorded times.
+    """
+    started = time.perf_counter()
+    clock = None
+    now = None
+    live_data = {}
+    log_captures = False
+    ticks = 0
+
+    for record in load_recording(path):
+        now = _parse_time(record['at'])
+        if record['type'] == 'state':
+            if clock is None:  # Later state records are from bot restarts
+                clock = ClockState.from_checkpoint(record['state'])
+                clock._now = lambda: now  # Follows `now` as the loop advances
+                log_captures = record.get('capture_source') == 'logs'
+            continue
+        if clock is None:
+            continue
+
+        if record['type'] == 'event':
+            event = record['record']
+            if event['event'] == 'stop':
+                await clock.stop_match(_parse_time(event['stopped_at']))
+                continue
+            if event['event'] != 'switch':
+                clock.apply_journal_record(event)
+                continue
+            switch = event['switch']
+            if switch.get('method', 'manual') == 'manual':
+                await clock.manual_switch(switch['to_team'])
+            elif log_captures:
+                await clock._auto_switch_to(switch['to_team'], switch.get('reason', 'Auto-switch'), method=switch['method'])
+
+        elif record['type'] == 'live':
+            live_data.update(record['data'])
+            live_data['timestamp'] = now
+            await clock.apply_game_data(live_data, detect_captures=not log_captures)
+            ticks += 1
+
+    if clock is None:
+        raise ValueError(f"{path} has no recorded clock state")
+
+    allied = clock.calculate_dmt_score('allied')
+    axis = clock.calculate_dmt_score('axis')
+    return {
+        'ticks': ticks,
+        'switches': [dict(s, timestamp=s['timestamp'].isoformat() if s.get('timestamp') else None) for s in clock.switches],
+        'time_a': clock.total_time('A'),
+        'time_b': clock.total_time('B'),
+        'allied': allied,
+        'axis': axis,
+        'elapsed': time.perf_counter() - started
+    }
+
+class RenderContext(NamedTuple):
+    """One tick's worth of display values, shared by every embed and message formatter"""
+    now: datetime.datetime
+    game_info: dict
+    allies_status: dict
+    axis_status: dict
+    allied_scores: dict
+    axis_scores: dict
+    allied_name: str
+    axis_name: str
+    switches: int
+
+    def team_name(self, team):
+        return self.allied_name if team == 'A' else self.axis_name
+
+    def leader(self):
+        """('allied' | 'axis' | None, DMT lead)"""
+        allied = self.allied_scores['total_dmt']
+        axis = self.axis_scores['total_dmt']
+        if allied > axis:
+            return 'allied', allied - axis
+        if axis > allied:
+            return 'axis', axis - allied
+        return None, 0
+
+class GameMessageQueue:
+    """Background, paced delivery of one match's in-game messages.
+
+    Messages go out in order, at least `min_gap` seconds apart, without the
+    caller waiting on CRCON. A message with a `kind` replaces any unsent
+    message of the kinds in `replaces` (default: its own kind), so a burst of
+    captures only announces the latest state.
+    """
+
+    def __init__(self, clock, min_gap=None):
+        self.clock = clock
+        self.min_gap = min_gap if min_gap is not None else float(os.getenv('CRCON_MESSAGE_GAP', '5'))
+        self._pending = []  # [(kind, text)]
+        self._last_sent = float('-inf')
+        self._worker = None
+
+    def post(self, text, kind=None, replaces=None):
+        """Queue a message for the match's CRCON server"""
+        replaces = replaces if replaces is not None else ((kind,) if kind else ())
+        kept = [(k, t) for k, t in self._pending if k not in replaces]
+        if len(kept) < len(self._pending):
+            metrics.inc('hll_game_messages_coalesced_total', len(self._pending) - len(kept))
+        self._pending = kept + [(kind, text)]
+
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._drain())
+
+    async def _drain(self):
+        while self._pending:
+            # Wait out the gap first - a newer message may replace the next one meanwhile
+            wait = self._last_sent + self.min_gap - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+
+            _, text = self._pending.pop(0)
+            client = self.clock.crcon_client
+            if not client:
+                crcon_logger.debug("Dropping in-game message, CRCON not connected: %s", text)
+                continue
+            try:
+                await client.send_message(text)
+            except Exception as e:
+                logger.warning(f"Error sending in-game message: {e}")
+            self._last_sent = time.monotonic()
+
 class ClockState:
     """Enhanced clock state with live updating team times"""
 
@@ -221,11 +1793,20 @@ class ClockState:
         self.clock_started = False
 
         # CRCON integration
+        self.server = None  # CRCON server profile name (None = the first profile)
         self.crcon_client = None
         self.game_data = None
+        self.snapshot = None  # GameSnapshot parsed from game_data
         self.auto_switch = False
         self.last_scores = {'allied': 0, 'axis': 0}
         self.switches = []
+        self.log_watcher = None  # Set when captures come from the CRCON log stream
+        self.journal = None  # MatchJournal once the clock has a message to resume into
+        self.recorder = None  # MatchRecorder when RECORD_MATCHES is on
+        self.report = None  # MatchReport while a match is running, if MATCH_REPORTS is on
+        self.game_messages = GameMessageQueue(self)
+        self._now = _utcnow  # Replaced by replay_match to run on recorded time
+        self.timeline = MatchTimeline()  # Per-tick history for graphs and reports
         self.last_update = None
         self._first_update_done = False  # Track if first update completed
         self._lock = asyncio.Lock()  # Thread safety for time updates
@@ -253,44 +1834,45 @@ class ClockState:
         }
         # Player scores by team
         self.player_scores = {'allied': {}, 'axis': {}}
+        self.dmt = DMTScoreEngine()
 
     def get_time_remaining(self):
         """Get time remaining in match"""
         if self.countdown_end:
-            now = datetime.datetime.now(timezone.utc)
+            now = self._now()
             remaining = (self.countdown_end - now).total_seconds()
             return max(0, int(remaining))
         return DEFAULT_MATCH_DURATION
 
-    def get_current_elapsed(self):
+    def get_current_elapsed(self, now=None):
         """Get elapsed time since last switch"""
         if self.last_switch and self.clock_started and self.active:
-            return (datetime.datetime.now(timezone.utc) - self.last_switch).total_seconds()
+            return ((now or self._now()) - self.last_switch).total_seconds()
         return 0
 
-    def total_time(self, team):
+    def total_time(self, team, now=None):
         """Get total time for a team INCLUDING current elapsed time"""
         if team == "A":
             base_time = self.time_a
             # Add current elapsed time if Allies are currently active
             if self.active == "A" and self.clock_started:
-                base_time += self.get_current_elapsed()
+                base_time += self.get_current_elapsed(now)
             return base_time
         elif team == "B":
             base_time = self.time_b
             # Add current elapsed time if Axis are currently active
             if self.active == "B" and self.clock_started:
-                base_time += self.get_current_elapsed()
+                base_time += self.get_current_elapsed(now)
             return base_time
         return 0
 
-    def get_live_status(self, team):
+    def get_live_status(self, team, now=None):
         """Get live status with current timing info"""
-        total = self.total_time(team)
+        total = self.total_time(team, now)
         
         if self.active == team and self.clock_started:
             # Currently active - they're defending the point they control
-            current_elapsed = self.get_current_elapsed()
+            current_elapsed = self.get_current_elapsed(now)
             return {
                 'total_time': total,
                 'status': '🛡️ Defending',
@@ -306,25 +1888,148 @@ class ClockState:
                 'is_active': False
             }
 
+    def to_checkpoint(self):
+        """Serializable snapshot of everything needed to resume the clock"""
+        return {
+            'message_id': self.message.id if self.message else None,
+            'server': self.server,
+            'time_a': self.time_a,
+            'time_b': self.time_b,
+            'active': self.active,
+            'last_switch': self.last_switch,
+            'match_start_time': self.match_start_time,
+            'started': self.started,
+            'clock_started': self.clock_started,
+            'auto_switch': self.auto_switch,
+            'ingame_messages': self.ingame_messages,
+            'team_names': self.team_names,
+            'squad_config': self.squad_config,
+            'switches': self.switches
+        }
+
+    @classmethod
+    def from_checkpoint(cls, state, records=()):
+        """Rebuild a clock from a checkpoint plus the journal records written after it"""
+        clock = cls()
+        clock.server = state.get('server')
+        clock.time_a = state.get('time_a', 0)
+        clock.time_b = state.get('time_b', 0)
+        clock.active = state.get('active')
+        clock.last_switch = _parse_time(state.get('last_switch'))
+        clock.match_start_time = _parse_time(state.get('match_start_time'))
+        clock.started = state.get('started', False)
+        clock.clock_started = state.get('clock_started', False)
+        clock.auto_switch = state.get('auto_switch', False)
+        clock.ingame_messages = state.get('ingame_messages', True)
+        clock.team_names.update(state.get('team_names', {}))
+        clock.squad_config.update(state.get('squad_config', {}))
+        clock.switches = [dict(s, timestamp=_parse_time(s.get('timestamp'))) for s in state.get('switches', [])]
+
+        for record in records:
+            clock.apply_journal_record(record)
+        return clock
+
+    def apply_journal_record(self, record):
+        """Re-apply one journaled transition"""
+        event = record.get('event')
+        if event == 'start':
+            self.started = True
+            self.match_start_time = _parse_time(record.get('match_start_time'))
+        elif event == 'switch':
+            switch = dict(record['switch'], timestamp=_parse_time(record['switch'].get('timestamp')))
+            self.switches.append(switch)
+            self.time_a = record['time_a']
+            self.time_b = record['time_b']
+            self.active = switch['to_team']
+            self.last_switch = switch['timestamp']
+            self.clock_started = True
+        elif event == 'stop':
+            self.time_a = record['time_a']
+            self.time_b = record['time_b']
+            self.active = None
+            self.started = False
+        elif event == 'settings':
+            for key in ('auto_switch', 'ingame_messages'):
+                if key in record:
+                    setattr(self, key, record[key])
+            self.team_names.update(record.get('team_names', {}))
+            self.squad_config.update(record.get('squad_config', {}))
+
+    def record(self, event, **fields):
+        """Journal a transition if this clock is being journaled"""
+        if self.journal:
+            self.journal.append(event, **fields)
+            self.journal.maybe_checkpoint(self)
+        if self.recorder:
+            self.recorder.write_event(self._now(), event, fields)
+
+    def record_switch(self, switch_data):
+        self.record('switch', switch=switch_data, time_a=self.time_a, time_b=self.time_b)
+        if self.report:
+            self.report.write_switch(switch_data, self.time_a, self.time_b)
+
+    def record_settings(self):
+        self.record('settings', auto_switch=self.auto_switch, ingame_messages=self.ingame_messages,
+                    team_names=self.team_names, squad_config=self.squad_config)
+
+    def end_journal(self):
+        """Drop the journal and close the recording when the match is finished or replaced"""
+        if self.journal:
+            self.journal.discard()
+            self.journal = None
+        if self.recorder:
+            logger.info(f"Match recording saved to {self.recorder.path}")
+            self.recorder.close()
+            self.recorder = None
+        if self.report:
+            # Reports that weren't finished belong to a reset or replaced match
+            self.report.discard()
+            self.report = None
+
+    def finish_report(self, ctx, end_reason):
+        """Write the final result to the match report"""
+        if self.report:
+            self.report.finish(self, ctx, end_reason)
+            logger.info(f"Match report saved to {self.report.path}")
+            self.report = None
+
+    def start_recording(self, channel_id):
+        """Start the match report, and the replay recording if RECORD_MATCHES is on"""
+        if not self.match_start_time:
+            return
+        if os.getenv('MATCH_REPORTS', 'true').lower() == 'true':
+            self.report = MatchReport(channel_id, self.match_start_time)
+            self.report.write_header(self)
+        if os.getenv('RECORD_MATCHES', 'false').lower() == 'true':
+            self.recorder = MatchRecorder(channel_id, self.match_start_time)
+            self.recorder.write_state(self)
+
     async def connect_crcon(self):
-        """Connect to CRCON with API key"""
+        """Attach to the shared CRCON client"""
         try:
-            # Close any existing connection first
-            if self.crcon_client:
-                try:
-                    await self.crcon_client.__aexit__(None, None, None)
-                except Exception as e:
-                    logger.warning(f"Error closing existing CRCON connection: {e}")
-
-            self.crcon_client = APIKeyCRCONClient()
-            await self.crcon_client.__aenter__()
-            logger.info("Connected to CRCON successfully")
+            self.crcon_client = await get_crcon_client(self.server)
+            logger.info(f"Connected to CRCON successfully ({self.server or 'default server'})")
             return True
+        except CRCONUnavailable as e:
+            logger.debug(f"Not connecting to CRCON: {e}")
+            self.crcon_client = None
+            return False
         except Exception as e:
             logger.error(f"Failed to connect to CRCON: {e}")
             self.crcon_client = None
             return False
     
+    def start_log_watcher(self, source):
+        """Take captures from a log source instead of diffing scores between polls"""
+        self.stop_log_watcher()
+        self.log_watcher = CaptureLogWatcher(self, source)
+        self.log_watcher.start()
+
+    def stop_log_watcher(self):
+        if self.log_watcher:
+            self.log_watcher.stop()
+            self.log_watcher = None
+
     async def update_from_game(self):
         """Update from CRCON game data"""
         if not self.crcon_client:
@@ -332,11 +2037,19 @@ class ClockState:
 
         try:
             live_data = await self.crcon_client.get_live_game_state()
-            if not live_data:
-                return
+            if live_data:
+                await self.apply_game_data(live_data)
+        except Exception as e:
+            logger.error(f"Error updating from game: {e}")
 
+    async def apply_game_data(self, live_data, detect_captures=True):
+        """Process one get_live_game_state result"""
+        try:
             self.game_data = live_data
-            self.last_update = datetime.datetime.now(timezone.utc)
+            self.snapshot = parse_game_snapshot(live_data)
+            self.last_update = self._now()
+            if self.recorder:
+                self.recorder.write_live(self.last_update, live_data)
 
             # Update player scores if in tournament mode
             if self.tournament_mode:
@@ -345,62 +2058,63 @@ class ClockState:
             # Only check for auto-switch if we have previous scores to compare
             # This prevents false triggers on first connection
             if self.auto_switch and self.started and self._first_update_done:
-                await self._check_score_changes()
+                if detect_captures:
+                    await self._check_score_changes()
             else:
                 # First update - just store the scores without triggering auto-switch
-                game_state = self.game_data.get('game_state', {})
-                if isinstance(game_state, dict) and 'result' in game_state:
-                    result = game_state['result']
-                    if isinstance(result, dict):
-                        self.last_scores = {
-                            'allied': result.get('allied_score', 0),
-                            'axis': result.get('axis_score', 0)
-                        }
+                self.last_scores = {'allied': self.snapshot.allied_score, 'axis': self.snapshot.axis_score}
                 self._first_update_done = True
 
+            if self.started:
+                self.record_timeline()
+                if self.report:
+                    self.report.write_scores(self.last_update, self.snapshot.players)
+
         except Exception as e:
             logger.error(f"Error updating from game: {e}")
+
+    def record_timeline(self):
+        """Add the current snapshot and control times to the match timeline"""
+        elapsed = 0
+        if self.match_start_time:
+            elapsed = (self.last_update - self.match_start_time).total_seconds()
+        combat = {team: self.dmt.combat(team)['combat_total'] for team in ('allied', 'axis')}
+        self.timeline.record(elapsed, self.snapshot, combat, self.total_time('A'), self.total_time('B'), self.active)
     
     async def _check_score_changes(self):
         """Check for captures to trigger auto-switch - focus on point control"""
-        if not self.game_data or 'game_state' not in self.game_data:
+        if not self.snapshot:
             return
         
-        game_state = self.game_data['game_state']
-        
-        # Parse your CRCON's result format for scores
-        current_allied = 0
-        current_axis = 0
-        
-        if isinstance(game_state, dict) and 'result' in game_state:
-            result = game_state['result']
-            if isinstance(result, dict):
-                current_allied = result.get('allied_score', 0)
-                current_axis = result.get('axis_score', 0)
+        current_allied = self.snapshot.allied_score
+        current_axis = self.snapshot.axis_score
         
         # Debug logging to see what's happening
-        logger.info(f"Score check - Allied: {self.last_scores['allied']} -> {current_allied}, Axis: {self.last_scores['axis']} -> {current_axis}")
+        tick_logger.debug("Score check - Allied: %s -> %s, Axis: %s -> %s",
+                          self.last_scores['allied'], current_allied, self.last_scores['axis'], current_axis)
         
         # Check for score increases (point captures)
-        if current_allied > self.last_scores['allied']:
-            logger.info(f"Allied score increased! Switching to Allies")
+        if self.log_watcher and self.log_watcher.running:
+            tick_logger.debug("Captures handled by the log stream, skipping score-based switch")
+        elif current_allied > self.last_scores['allied']:
+            logger.info("Allied score increased! Switching to Allies")
             await self._auto_switch_to('A', "Allies captured the center point")
         elif current_axis > self.last_scores['axis']:
-            logger.info(f"Axis score increased! Switching to Axis") 
+            logger.info("Axis score increased! Switching to Axis")
             await self._auto_switch_to('B', "Axis captured the center point")
         else:
-            logger.debug(f"No score changes detected")
+            tick_logger.debug("No score changes detected")
         
         # Update last known scores
         self.last_scores = {'allied': current_allied, 'axis': current_axis}
     
-    async def _auto_switch_to(self, team: str, reason: str = "Auto-switch"):
+    async def _auto_switch_to(self, team: str, reason: str = "Auto-switch", method: str = 'auto'):
         """Auto-switch teams with proper time tracking"""
         if self.active == team:
             return
 
         async with self._lock:
-            now = datetime.datetime.now(timezone.utc)
+            now = self._now()
 
             # IMPORTANT: Update accumulated time BEFORE switching
             if self.active == "A" and self.last_switch:
@@ -415,7 +2129,7 @@ class ClockState:
                 'from_team': self.active,
                 'to_team': team,
                 'timestamp': now,
-                'method': 'auto',
+                'method': method,
                 'reason': reason
             }
             self.switches.append(switch_data)
@@ -427,103 +2141,90 @@ class ClockState:
             # Start the clock if this is the first switch
             if not self.clock_started:
                 self.clock_started = True
+
+            self.record_switch(switch_data)
         
         # Send notification to game with DMT scores (if enabled)
+        ctx = self.render_context(now)
         if self.crcon_client and self.ingame_messages:
-            team_name = self.team_names.get('allied' if team == 'A' else 'axis', 'Allies' if team == 'A' else 'Axis')
-            allied_scores = self.calculate_dmt_score('allied')
-            axis_scores = self.calculate_dmt_score('axis')
-            team_a_name = self.team_names['allied']
-            team_b_name = self.team_names['axis']
-
-            msg = f"🔄 {team_name} captured the point! | {team_a_name}: Combat {allied_scores['combat_total']:,.0f} + Cap {allied_scores['cap_score']:,.0f} = {allied_scores['total_dmt']:,.0f} DMT | {team_b_name}: Combat {axis_scores['combat_total']:,.0f} + Cap {axis_scores['cap_score']:,.0f} = {axis_scores['total_dmt']:,.0f} DMT"
-            await self.crcon_client.send_message(msg)
+            self.game_messages.post(format_capture_message(ctx, team, "🔄"), kind='capture')
         
         # IMPORTANT: Update the Discord embed immediately
         if self.message:
-            success = await safe_edit_message(self.message, embed=build_embed(self))
+            success = await safe_edit_message(self.message, embed=build_embed(self, ctx))
             if success:
-                logger.info(f"Discord embed updated after auto-switch to {team}")
+                logger.debug("Discord embed updated after auto-switch to %s", team)
             else:
                 self.message = None
             
         logger.info(f"Auto-switched to team {team}: {reason}")
     
+    async def stop_match(self, now=None):
+        """Bank the running hold and stop the clock, recording when so a replay stops at the same instant"""
+        async with self._lock:
+            now = now or self._now()
+            if self.active and self.last_switch:
+                elapsed = (now - self.last_switch).total_seconds()
+                if self.active == "A":
+                    self.time_a += elapsed
+                elif self.active == "B":
+                    self.time_b += elapsed
+
+            self.active = None
+            self.started = False
+            self.record('stop', stopped_at=now, time_a=self.time_a, time_b=self.time_b)
+        return now
+
+    async def manual_switch(self, team):
+        """Switch by hand; unlike an auto-switch this is recorded even if `team` already holds the point"""
+        async with self._lock:
+            now = self._now()
+
+            switch_data = {
+                'from_team': self.active,
+                'to_team': team,
+                'timestamp': now,
+                'method': 'manual'
+            }
+
+            if not self.clock_started:
+                # First switch - start the clock
+                self.clock_started = True
+                self.last_switch = now
+                self.active = team
+                self.switches = [switch_data]
+            else:
+                # Subsequent switches - accumulate time properly
+                elapsed = (now - self.last_switch).total_seconds()
+
+                # Add elapsed time to the previously active team
+                if self.active == "A":
+                    self.time_a += elapsed
+                elif self.active == "B":
+                    self.time_b += elapsed
+
+                # Switch to new team
+                self.active = team
+                self.last_switch = now
+                self.switches.append(switch_data)
+
+            self.record_switch(switch_data)
+        return now
+
     def get_game_info(self):
         """Get formatted game information"""
-        if not self.game_data:
+        if not self.snapshot:
             return {
                 'map': 'No Connection',
                 'players': 0,
                 'game_time': 0,
                 'connection_status': 'Disconnected'
             }
-        
-        game_state = self.game_data.get('game_state', {})
-        team_view = self.game_data.get('team_view', {})
-        map_info = self.game_data.get('map_info', {})
-        
-        # Extract map name - handle your CRCON's result wrapper
-        current_map = 'Unknown'
-        
-        if isinstance(map_info, dict) and 'result' in map_info:
-            result = map_info['result']
-            if isinstance(result, dict):
-                # Try the pretty_name first (should be "Elsenborn Ridge Warfare")
-                if 'pretty_name' in result:
-                    current_map = result['pretty_name']
-                # Fallback to nested map object
-                elif 'map' in result and isinstance(result['map'], dict):
-                    current_map = result['map'].get('pretty_name', result['map'].get('name', 'Unknown'))
-        
-        # Extract player count from your CRCON result format
-        player_count = 0
-        if isinstance(game_state, dict) and 'result' in game_state:
-            result = game_state['result']
-            if isinstance(result, dict):
-                # Your format shows num_allied_players and num_axis_players
-                allied_players = result.get('num_allied_players', 0)
-                axis_players = result.get('num_axis_players', 0)
-                player_count = allied_players + axis_players
-
-        # Fallback: If game_state returns 0 players, count from detailed_players
-        if player_count == 0:
-            detailed_players = self.game_data.get('detailed_players', {})
-            if isinstance(detailed_players, dict) and 'result' in detailed_players:
-                result = detailed_players['result']
-                if isinstance(result, dict) and 'players' in result:
-                    players_data = result['players']
-                    if isinstance(players_data, dict):
-                        # Count players in the dictionary
-                        player_count = len(players_data)
-        
-        # Extract game time from your CRCON result format - convert to remaining time display
-        game_time_remaining = 0
-        if isinstance(game_state, dict) and 'result' in game_state:
-            result = game_state['result']
-            if isinstance(result, dict):
-                # Get the raw time remaining from server
-                raw_time = result.get('time_remaining', 0)
-                if raw_time > 0:
-                    game_time_remaining = raw_time
-        
-        # Track scores internally for auto-switch using your CRCON format
-        allied_score = 0
-        axis_score = 0
-        
-        if isinstance(game_state, dict) and 'result' in game_state:
-            result = game_state['result']
-            if isinstance(result, dict):
-                allied_score = result.get('allied_score', 0)
-                axis_score = result.get('axis_score', 0)
-        
-        # Store scores for auto-switch logic
-        self.last_scores = {'allied': allied_score, 'axis': axis_score}
-        
+
         return {
-            'map': current_map,
-            'players': player_count,
-            'game_time': game_time_remaining,  # This is now the server's remaining time
+            'map': self.snapshot.map_name,
+            'players': self.snapshot.player_count,
+            'game_time': self.snapshot.time_remaining,  # This is now the server's remaining time
             'connection_status': 'Connected',
             'last_update': self.last_update.strftime('%H:%M:%S') if self.last_update else 'Never'
         }
@@ -531,170 +2232,75 @@ class ClockState:
     def format_time(self, secs):
         return str(datetime.timedelta(seconds=max(0, int(secs))))
 
+    def render_context(self, now=None):
+        """Freeze everything the embeds and in-game messages show at one instant"""
+        now = now or self._now()
+        return RenderContext(
+            now=now,
+            game_info=self.get_game_info(),
+            allies_status=self.get_live_status('A', now),
+            axis_status=self.get_live_status('B', now),
+            allied_scores=self.calculate_dmt_score('allied', now),
+            axis_scores=self.calculate_dmt_score('axis', now),
+            allied_name=self.team_names.get('allied', 'Allies'),
+            axis_name=self.team_names.get('axis', 'Axis'),
+            switches=len(self.switches)
+        )
+
     def update_player_scores(self):
-        """Extract player scores from detailed_players data and organize by squad"""
-        if not self.game_data or 'detailed_players' not in self.game_data:
+        """Organize the snapshot's player scores by squad"""
+        if not self.snapshot:
             return
 
-        detailed_players = self.game_data['detailed_players']
-
         # Reset player scores
         self.player_scores = {'allied': {}, 'axis': {}}
+        self.dmt.reset()
 
-        # Parse detailed_players structure
-        if isinstance(detailed_players, dict) and 'result' in detailed_players:
-            result = detailed_players['result']
-
-            # Process players - handle format where players are keyed by player_id
-            if isinstance(result, dict) and 'players' in result:
-                players_data = result['players']
-
-                # Check if players are keyed by player_id (dict format)
-                if isinstance(players_data, dict):
-                    # Check if it looks like player_id keys (not 'allied'/'axis' keys)
-                    first_key = next(iter(players_data.keys()), None) if players_data else None
-                    if first_key and first_key not in ['allied', 'axis', 'allies']:
-                        # Players keyed by player_id - iterate and organize by team
-                        for player_id, player_data in players_data.items():
-                            if isinstance(player_data, dict):
-                                # Get team - normalize "allies" to "allied"
-                                team = player_data.get('team', '')
-                                if team == 'allies':
-                                    team_key = 'allied'
-                                elif team == 'axis':
-                                    team_key = 'axis'
-                                else:
-                                    continue  # Skip if no valid team
-
-                                # Get squad/unit name
-                                squad_name = player_data.get('unit_name', player_data.get('unit', 'Unknown'))
-
-                                # Add player score
-                                self._add_player_score(player_data, squad_name, team_key)
-                    else:
-                        # Players organized by team
-                        self._process_team_scores(players_data.get('allied', []), 'allied')
-                        self._process_team_scores(players_data.get('axis', []), 'axis')
-                # Or direct allied/axis keys
-                elif 'allied' in result or 'axis' in result:
-                    self._process_team_scores(result.get('allied', []), 'allied')
-                    self._process_team_scores(result.get('axis', []), 'axis')
-        # Handle direct list format
-        elif isinstance(detailed_players, dict) and ('allied' in detailed_players or 'axis' in detailed_players):
-            self._process_team_scores(detailed_players.get('allied', []), 'allied')
-            self._process_team_scores(detailed_players.get('axis', []), 'axis')
-
-        # Log summary of what was found
-        for team in ['allied', 'axis']:
-            squads = self.player_scores.get(team, {})
-            total_players = sum(len(players) for players in squads.values())
-            total_combat = sum(sum(p['combat_score'] for p in players) for players in squads.values())
-            logger.info(f"Player scores [{team}]: {len(squads)} squads, {total_players} players, total combat={total_combat}")
-
-    def _process_team_scores(self, team_data, team_key):
-        """Process individual team's player scores"""
-        # Handle list of players directly
-        if isinstance(team_data, list):
-            for player in team_data:
-                if isinstance(player, dict):
-                    # Get squad/unit name from player data
-                    squad_name = player.get('unit_name', player.get('unit', player.get('squad', 'Unknown')))
-                    self._add_player_score(player, squad_name, team_key)
-            return
-
-        # Handle dict format
-        if not isinstance(team_data, dict):
-            return
+        for player in self.snapshot.players:
+            self._add_player_score(player)
 
-        # Team data might have 'players' or 'squads' key
-        players = team_data.get('players', [])
-        squads = team_data.get('squads', {})
-
-        # If we have squad data organized by squad
-        if squads and isinstance(squads, dict):
-            for squad_name, squad_info in squads.items():
-                if isinstance(squad_info, dict) and 'players' in squad_info:
-                    for player in squad_info['players']:
-                        self._add_player_score(player, squad_name, team_key)
-                elif isinstance(squad_info, list):
-                    # Squad info is a list of players
-                    for player in squad_info:
-                        self._add_player_score(player, squad_name, team_key)
-
-        # If we have flat player list with squad info
-        elif players and isinstance(players, list):
-            for player in players:
-                squad_name = player.get('unit_name', player.get('unit', player.get('squad', 'Unknown')))
-                self._add_player_score(player, squad_name, team_key)
+        # Log summary of what was found - the sums are only worth doing if it will be written
+        if tick_logger.isEnabledFor(logging.DEBUG):
+            for team in ['allied', 'axis']:
+                squads = self.player_scores.get(team, {})
+                total_players = sum(len(players) for players in squads.values())
+                total_combat = sum(sum(p['combat_score'] for p in players) for players in squads.values())
+                tick_logger.debug("Player scores [%s]: %d squads, %d players, total combat=%d",
+                                  team, len(squads), total_players, total_combat)
 
-    def _add_player_score(self, player_data, squad_name, team_key):
+    def _add_player_score(self, player: PlayerScore):
         """Add individual player score to tracking"""
-        if not isinstance(player_data, dict):
-            return
-
-        player_name = player_data.get('player', player_data.get('name', 'Unknown'))
-
-        # Case-insensitive lookup for combat score
-        combat_score = 0
-        for key in player_data:
-            if key.lower() in ['combat', 'combat_score', 'combatscore']:
-                combat_score = player_data[key]
-                break
-
-        # Normalize squad name to lowercase for case-insensitive matching
-        squad_name_lower = squad_name.lower() if squad_name else 'unknown'
+        squads = self.player_scores[player.team]
 
         # Store player score by squad
-        if squad_name_lower not in self.player_scores[team_key]:
-            self.player_scores[team_key][squad_name_lower] = []
+        if player.squad not in squads:
+            squads[player.squad] = []
 
-        self.player_scores[team_key][squad_name_lower].append({
-            'name': player_name,
-            'combat_score': combat_score
+        squads[player.squad].append({
+            'name': player.name,
+            'combat_score': player.combat_score
         })
+        self.dmt.add(player.team, player.squad, player.combat_score)
 
-    def calculate_dmt_score(self, team_key):
+    def calculate_dmt_score(self, team_key, now=None):
         """Calculate DMT Total Score for a team"""
         if not self.tournament_mode:
             return 0
 
-        player_scores = self.player_scores.get(team_key, {})
-
-        # Calculate combat score: 3 × (sum of highest scorer from EACH squad)
-        # Count ALL squads, not just configured ones
-        crew_scores = []
-        commander_score = 0
-
-        for squad_name, squad_players in player_scores.items():
-            if not squad_players:
-                continue
-
-            # Find highest combat score in this squad
-            highest_score = max(p['combat_score'] for p in squad_players)
-
-            # Check if this is a commander squad (usually 'command' or 'commander')
-            if squad_name.lower() in ['command', 'commander', 'cmd']:
-                commander_score = highest_score
-            else:
-                crew_scores.append(highest_score)
-
-        # Calculate combat total: 3 × (sum of all squad highs) + commander
-        combat_total = 3 * sum(crew_scores) + commander_score
-
-        # Debug logging to help diagnose score issues
-        logger.debug(f"DMT Calc [{team_key}]: {len(crew_scores)} squads found, highs={crew_scores}, commander={commander_score}, combat_total={combat_total}")
+        # Combat part is cached per snapshot by the score engine
+        combat = self.dmt.combat(team_key)
 
         # Calculate cap score (time in seconds × 0.5)
-        cap_seconds = self.total_time('A' if team_key == 'allied' else 'B')
+        cap_seconds = self.total_time('A' if team_key == 'allied' else 'B', now)
         cap_score = cap_seconds * 0.5
 
         # Total DMT score
-        total_dmt = combat_total + cap_score
+        total_dmt = combat['combat_total'] + cap_score
 
         return {
-            'crew_scores': crew_scores,
-            'commander_score': commander_score,
-            'combat_total': combat_total,
+            'crew_scores': combat['crew_scores'],
+            'commander_score': combat['commander_score'],
+            'combat_total': combat['combat_total'],
             'cap_seconds': cap_seconds,
             'cap_score': cap_score,
             'total_dmt': total_dmt
@@ -704,25 +2310,173 @@ def user_is_admin(interaction: discord.Interaction):
     admin_role = os.getenv('ADMIN_ROLE_NAME', 'admin').lower()
     return any(role.name.lower() == admin_role for role in interaction.user.roles)
 
+class MessageEditQueue:
+    """Funnels Discord message edits through one paced worker per message.
+
+    Edits requested while another is waiting are merged (newest values win),
+    an edit whose rendered content matches what the message already shows is
+    skipped, and edits in the same channel are spaced `min_interval` apart or
+    by the Retry-After Discord sends back with a 429. discord.py waits out short
+    limits itself; the bot's max_ratelimit_timeout hands longer ones back here.
+    """
+
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self._pending = {}       # message id -> [message, kwargs, waiters]
+        self._workers = {}       # message id -> drain task
+        self._fingerprints = {}  # message id -> fingerprint of the last successful edit
+        self._next_edit_at = {}  # channel id -> earliest loop time for the next edit
+
+    async def edit(self, message, **kwargs):
+        """Queue an edit and wait for the (possibly merged) edit that carries it"""
+        if not message:
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue(message, kwargs, [future])
+        if message.id not in self._workers:
+            self._workers[message.id] = asyncio.create_task(self._drain(message.id))
+        return await future
+
+    def _queue(self, message, kwargs, waiters, newer_wins=True):
+        entry = self._pending.get(message.id)
+        if entry is None:
+            self._pending[message.id] = [message, dict(kwargs), list(waiters)]
+        elif newer_wins:
+            entry[0] = message
+            entry[1].update(kwargs)
+            entry[2].extend(waiters)
+        else:
+            # Re-queued edit: anything requested since takes priority
+            entry[1] = {**kwargs, **entry[1]}
+            entry[2].extend(waiters)
+
+    @staticmethod
+    def _fingerprint(kwargs):
+        """Hash the rendered form of an edit so identical edits can be skipped"""
+        parts = []
+        for key in sorted(kwargs):
+            value = kwargs[key]
+            if isinstance(value, discord.Embed):
+                value = value.to_dict()
+            elif isinstance(value, discord.ui.View):
+                value = value.to_components()
+            parts.append((key, value))
+        return hash(json.dumps(parts, sort_keys=True, default=str))
+
+    async def _drain(self, message_id):
+        loop = asyncio.get_running_loop()
+        try:
+            while message_id in self._pending:
+                channel_id = self._pending[message_id][0].channel.id
+
+                # Wait for the channel's edit slot; edits queued meanwhile merge in
+                delay = self._next_edit_at.get(channel_id, 0) - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                message, kwargs, waiters = self._pending.pop(message_id)
+                try:
+                    fingerprint = self._fingerprint(kwargs)
+                    if fingerprint == self._fingerprints.get(message_id):
+                        metrics.inc('hll_discord_edits_total', channel=channel_id, outcome='skipped')
+                        result = True
+                    else:
+                        result = await self._send(message, kwargs, waiters, channel_id)
+                        if result is None:
+                            continue  # Rate limited and re-queued
+                        if result:
+                            self._fingerprints[message_id] = fingerprint
+                        else:
+                            self._fingerprints.pop(message_id, None)
+                except Exception as e:
+                    logger.error(f"Unexpected error editing message: {e}")
+                    result = False
+
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_result(result)
+        except Exception as e:
+            logger.error(f"Message edit worker failed: {e}")
+        finally:
+            self._workers.pop(message_id, None)
+            # Never leave callers waiting on an edit that will not happen
+            entry = self._pending.pop(message_id, None)
+            for waiter in entry[2] if entry else []:
+                if not waiter.done():
+                    waiter.set_result(False)
+
+    async def _send(self, message, kwargs, waiters, channel_id):
+        """Edit the message; returns None if the edit was re-queued after a 429"""
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            await message.edit(**kwargs)
+        except discord.NotFound:
+            logger.warning("Message was deleted, cannot update")
+            return self._edit_done(channel_id, started, 'deleted', False)
+        except discord.RateLimited as e:
+            retry_after = e.retry_after
+        except discord.HTTPException as e:
+            if e.status != 429:
+                logger.error(f"Failed to edit message: {e}")
+                return self._edit_done(channel_id, started, 'failed', False)
+            retry_after = self._retry_after(e)
+        except Exception as e:
+            logger.error(f"Unexpected error editing message: {e}")
+            return self._edit_done(channel_id, started, 'failed', False)
+        else:
+            self._next_edit_at[channel_id] = loop.time() + self.min_interval
+            return self._edit_done(channel_id, started, 'sent', True)
+
+        logger.warning(f"Rate limited editing message in channel {channel_id}, retrying in {retry_after:.1f}s")
+        self._next_edit_at[channel_id] = loop.time() + retry_after
+        self._queue(message, kwargs, waiters, newer_wins=False)
+        return self._edit_done(channel_id, started, 'rate_limited', None)
+
+    @staticmethod
+    def _edit_done(channel_id, started, outcome, result):
+        """Record an edit attempt's duration and outcome, passing its result through"""
+        metrics.observe('hll_discord_edit_seconds', time.perf_counter() - started, channel=channel_id)
+        metrics.inc('hll_discord_edits_total', channel=channel_id, outcome=outcome)
+        return result
+
+    def _retry_after(self, error):
+        """Read the wait time from a 429's rate-limit headers"""
+        headers = getattr(error.response, 'headers', None) or {}
+        for header in ('Retry-After', 'X-RateLimit-Reset-After'):
+            try:
+                return float(headers[header])
+            except (KeyError, TypeError, ValueError):
+                continue
+        return max(self.min_interval, 1.0)
+
+edit_queue = MessageEditQueue(float(os.getenv('DISCORD_EDIT_INTERVAL', '1')))
+
 async def safe_edit_message(message, **kwargs):
-    """Safely edit a Discord message with error handling"""
-    if not message:
-        return False
-    try:
-        await message.edit(**kwargs)
-        return True
-    except discord.NotFound:
-        logger.warning("Message was deleted, cannot update")
-        return False
-    except discord.HTTPException as e:
-        logger.error(f"Failed to edit message: {e}")
-        return False
-    except Exception as e:
-        logger.error(f"Unexpected error editing message: {e}")
-        return False
+    """Safely edit a Discord message through the shared edit queue"""
+    return await edit_queue.edit(message, **kwargs)
+
+def format_score_line(ctx: RenderContext):
+    """Both teams' DMT breakdown as one in-game message line"""
+    a, b = ctx.allied_scores, ctx.axis_scores
+    return (f"{ctx.allied_name}: Combat {a['combat_total']:,.0f} + Cap {a['cap_score']:,.0f} = {a['total_dmt']:,.0f} DMT | "
+            f"{ctx.axis_name}: Combat {b['combat_total']:,.0f} + Cap {b['cap_score']:,.0f} = {b['total_dmt']:,.0f} DMT")
+
+def format_capture_message(ctx: RenderContext, team, icon="⚔️"):
+    return f"{icon} {ctx.team_name(team)} captured the point! | {format_score_line(ctx)}"
+
+def format_final_message(ctx: RenderContext):
+    leader, _ = ctx.leader()
+    if leader:
+        winner_msg = f"{ctx.allied_name if leader == 'allied' else ctx.axis_name} WINS!"
+    else:
+        winner_msg = "DRAW!"
+    return f"🏁 MATCH COMPLETE! {winner_msg} | {format_score_line(ctx)}"
 
-def build_embed(clock: ClockState):
+def build_embed(clock: ClockState, ctx: RenderContext = None):
     """Build Discord embed with DMT Scoring"""
+    ctx = ctx or clock.render_context()
     embed = discord.Embed(
         title="🏆 HLL Tank Overwatch - DMT Scoring 🏆",
         description="**Win by highest DMT Total Score!**",
@@ -730,7 +2484,7 @@ def build_embed(clock: ClockState):
     )
 
     # Add game information
-    game_info = clock.get_game_info()
+    game_info = ctx.game_info
 
     # Start with map and players
     embed.description += f"\n🗺️ **Map:** {game_info['map']}\n👥 **Players:** {game_info['players']}/100"
@@ -739,9 +2493,9 @@ def build_embed(clock: ClockState):
     if game_info['game_time'] > 0:
         embed.description += f"\n⏰ **Server Game Time:** `{clock.format_time(game_info['game_time'])}`"
     
-    # Get live status for both teams
-    allies_status = clock.get_live_status('A')
-    axis_status = clock.get_live_status('B')
+    # Live status for both teams
+    allies_status = ctx.allies_status
+    axis_status = ctx.axis_status
     
     # Build team information focused on TIME CONTROL
     allies_value = f"**Control Time:** `{clock.format_time(allies_status['total_time'])}`\n**Status:** {allies_status['status']}"
@@ -760,18 +2514,16 @@ def build_embed(clock: ClockState):
     elif axis_status['total_time'] > allies_status['total_time']:
         axis_value += f"\n**Advantage:** `+{clock.format_time(time_diff)}`"
     
-    # Get team names
-    allied_name = clock.team_names.get('allied', 'Allies')
-    axis_name = clock.team_names.get('axis', 'Axis')
+    allied_name = ctx.allied_name
+    axis_name = ctx.axis_name
 
     embed.add_field(name=f"🇺🇸 {allied_name}", value=allies_value, inline=False)
     embed.add_field(name=f"🇩🇪 {axis_name}", value=axis_value, inline=False)
 
-    # Calculate and show DMT scores
-    allied_scores = clock.calculate_dmt_score('allied')
-    axis_scores = clock.calculate_dmt_score('axis')
-
     # Show DMT scores
+    allied_scores = ctx.allied_scores
+    axis_scores = ctx.axis_scores
+
     dmt_allied = f"**DMT Score: {allied_scores['total_dmt']:,.1f}**\n"
     dmt_allied += f"Combat: {allied_scores['combat_total']:,.0f} | Cap: {allied_scores['cap_score']:,.1f}"
 
@@ -782,35 +2534,95 @@ def build_embed(clock: ClockState):
     embed.add_field(name=f"🏆 {axis_name} DMT", value=dmt_axis, inline=True)
 
     # Show leader
-    if allied_scores['total_dmt'] > axis_scores['total_dmt']:
-        diff = allied_scores['total_dmt'] - axis_scores['total_dmt']
-        leader_text = f"🏆 **{allied_name}** leads by {diff:,.1f} points"
-    elif axis_scores['total_dmt'] > allied_scores['total_dmt']:
-        diff = axis_scores['total_dmt'] - allied_scores['total_dmt']
-        leader_text = f"🏆 **{axis_name}** leads by {diff:,.1f} points"
+    leader, diff = ctx.leader()
+    if leader:
+        leader_text = f"🏆 **{allied_name if leader == 'allied' else axis_name}** leads by {diff:,.1f} points"
     else:
         leader_text = "⚖️ **Tied**"
 
     embed.add_field(name="📊 Current Leader", value=leader_text, inline=False)
     
     # Footer with connection status
-    connection_status = f"🟢 CRCON Connected" if clock.crcon_client else "🔴 CRCON Disconnected"
+    if clock.crcon_client:
+        breaker = clock.crcon_client.breaker
+    else:
+        # A profile missing from CRCON_SERVERS falls back to CRCON_URL's breaker
+        breaker = crcon_breaker(crcon_servers().get(clock.server, (None,))[0] if clock.server else crcon_server()[1])
+    if breaker.state != 'closed':
+        connection_status = breaker.describe()
+    else:
+        connection_status = "🟢 CRCON Connected" if clock.crcon_client else "🔴 CRCON Disconnected"
     auto_status = " | 🤖 Auto ON" if clock.auto_switch else " | 🤖 Auto OFF"
     msg_status = " | 💬 Msgs ON" if clock.ingame_messages else " | 💬 Msgs OFF"
 
     footer_text = f"Match Clock by {os.getenv('BOT_AUTHOR', 'StoneyRebel')} | {connection_status}{auto_status}{msg_status}"
+    if clock.server and os.getenv('CRCON_SERVERS'):
+        footer_text += f" | 🖥️ {clock.server}"
     if game_info.get('last_update'):
         footer_text += f" | Updated: {game_info['last_update']}"
     
     embed.set_footer(text=footer_text)
     return embed
 
-class StartControls(discord.ui.View):
+def build_final_embed(clock: ClockState, ctx: RenderContext, end_reason=None):
+    """Final DMT results embed for a stopped match"""
+    embed = discord.Embed(title="🏁 Match Complete - DMT Results!", color=0xFFD700)
+    if end_reason:
+        embed.add_field(name="🕐 End Reason", value=end_reason, inline=False)
+
+    game_info = ctx.game_info
+    if game_info['connection_status'] == 'Connected':
+        embed.add_field(name="🗺️ Map", value=game_info['map'], inline=True)
+        embed.add_field(name="👥 Players", value=f"{game_info['players']}/100", inline=True)
+
+    # Final DMT scores
+    allied_scores = ctx.allied_scores
+    axis_scores = ctx.axis_scores
+    embed.add_field(
+        name=f"🇺🇸 {ctx.allied_name} - Final DMT",
+        value=f"**{allied_scores['total_dmt']:,.1f} DMT**\nCombat: {allied_scores['combat_total']:,.0f}\nCap: {allied_scores['cap_score']:,.1f} ({clock.format_time(ctx.allies_status['total_time'])})",
+        inline=True
+    )
+    embed.add_field(
+        name=f"🇩🇪 {ctx.axis_name} - Final DMT",
+        value=f"**{axis_scores['total_dmt']:,.1f} DMT**\nCombat: {axis_scores['combat_total']:,.0f}\nCap: {axis_scores['cap_score']:,.1f} ({clock.format_time(ctx.axis_status['total_time'])})",
+        inline=True
+    )
+
+    # Determine winner by DMT score
+    leader, dmt_diff = ctx.leader()
+    if leader:
+        winner = f"🏆 **{ctx.allied_name if leader == 'allied' else ctx.axis_name} Victory**\n*+{dmt_diff:,.1f} DMT advantage*"
+    else:
+        winner = "🤝 **Perfect Draw**\n*Equal DMT scores*"
+
+    embed.add_field(name="🎯 DMT Winner", value=winner, inline=False)
+    embed.add_field(name="🔄 Total Switches", value=str(ctx.switches), inline=True)
+    return embed
+
+class ClockControls(discord.ui.View):
+    """Persistent controls for one channel's clock.
+
+    Every button's custom_id ends with the channel id, so after a restart
+    restore_clocks can re-register the view against the existing message
+    with bot.add_view and its buttons keep working.
+    """
+
     def __init__(self, channel_id):
         super().__init__(timeout=None)
         self.channel_id = channel_id
+        for item in self.children:
+            item.custom_id = f"{item.custom_id}:{channel_id}"
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        if self.channel_id in clocks:
+            return True
+        await interaction.response.send_message("❌ This clock is no longer running. Use /reverse_clock to start a new one.", ephemeral=True)
+        return False
+
+class StartControls(ClockControls):
 
-    @discord.ui.button(label="▶️ Start Match", style=discord.ButtonStyle.success)
+    @discord.ui.button(label="▶️ Start Match", custom_id="hll:start", style=discord.ButtonStyle.success)
     async def start_match(self, interaction: discord.Interaction, button: discord.ui.Button):
         if not user_is_admin(interaction):
             return await interaction.response.send_message("❌ Admin role required.", ephemeral=True)
@@ -820,11 +2632,12 @@ class StartControls(discord.ui.View):
 
         clock = clocks[self.channel_id]
         clock.match_start_time = datetime.datetime.now(timezone.utc)
+        clock.start_recording(self.channel_id)
         clock.started = True
+        clock.record('start', match_start_time=clock.match_start_time)
 
         # Start the updater first
-        if not match_updater.is_running():
-            match_updater.start(self.channel_id)
+        match_scheduler.start(self.channel_id, get_update_interval(clock.server))
 
         view = TimerControls(self.channel_id)
 
@@ -836,49 +2649,39 @@ class StartControls(discord.ui.View):
         crcon_connected = await clock.connect_crcon()
 
         if crcon_connected:
-            clock.auto_switch = os.getenv('CRCON_AUTO_SWITCH', 'false').lower() == 'true'
+            clock.auto_switch = server_env(clock.server, 'CRCON_AUTO_SWITCH', 'false').lower() == 'true'
+            if server_env(clock.server, 'CRCON_CAPTURE_SOURCE', 'score').lower() == 'logs':
+                clock.start_log_watcher(CRCONLogSource(clock.crcon_client))
+            clock.record_settings()
 
             # Send start message with DMT scoring info (if enabled)
             if clock.ingame_messages:
                 team_a = clock.team_names['allied']
                 team_b = clock.team_names['axis']
                 start_msg = f"🏆 HLL Tank Overwatch: {team_a} vs {team_b} | DMT Scoring Active | Combat + Cap Time = Total Score"
-                await clock.crcon_client.send_message(start_msg)
+                clock.game_messages.post(start_msg)
 
             await interaction.edit_original_response(content="✅ Match started with CRCON!")
         else:
             await interaction.edit_original_response(content="✅ Match started (CRCON connection failed)")
 
-    @discord.ui.button(label="🔗 Test CRCON", style=discord.ButtonStyle.secondary)
+    @discord.ui.button(label="🔗 Test CRCON", custom_id="hll:test_crcon", style=discord.ButtonStyle.secondary)
     async def test_crcon(self, interaction: discord.Interaction, button: discord.ui.Button):
         await interaction.response.defer(ephemeral=True)
         
         try:
-            test_client = APIKeyCRCONClient()
-            async with test_client as client:
-                live_data = await client.get_live_game_state()
+            client = await get_crcon_client(channel_server(self.channel_id))
+            live_data = await client.get_live_game_state()
                 
-                if live_data:
-                    game_state = live_data.get('game_state', {})
-                    map_info = live_data.get('map_info', {})
-                    embed = discord.Embed(title="🟢 CRCON Test - SUCCESS", color=0x00ff00)
-                    embed.add_field(name="Status", value="✅ Connected", inline=True)
-                    
-                    # Extract map name
-                    map_name = 'Unknown'
-                    if isinstance(map_info, dict):
-                        if 'pretty_name' in map_info:
-                            map_name = map_info['pretty_name']
-                        elif 'name' in map_info:
-                            map_name = map_info['name']
-                        elif 'map' in map_info and isinstance(map_info['map'], dict):
-                            map_name = map_info['map'].get('pretty_name', 'Unknown')
-                    
-                    embed.add_field(name="Map", value=map_name, inline=True)
-                    embed.add_field(name="Players", value=f"{game_state.get('nb_players', 0)}/100", inline=True)
-                else:
-                    embed = discord.Embed(title="🟡 CRCON Test - PARTIAL", color=0xffaa00)
-                    embed.add_field(name="Status", value="Connected but no data", inline=False)
+            if live_data:
+                snapshot = parse_game_snapshot(live_data)
+                embed = discord.Embed(title="🟢 CRCON Test - SUCCESS", color=0x00ff00)
+                embed.add_field(name="Status", value="✅ Connected", inline=True)
+                embed.add_field(name="Map", value=snapshot.map_name, inline=True)
+                embed.add_field(name="Players", value=f"{snapshot.player_count}/100", inline=True)
+            else:
+                embed = discord.Embed(title="🟡 CRCON Test - PARTIAL", color=0xffaa00)
+                embed.add_field(name="Status", value="Connected but no data", inline=False)
                     
         except Exception as e:
             embed = discord.Embed(title="🔴 CRCON Test - FAILED", color=0xff0000)
@@ -886,26 +2689,24 @@ class StartControls(discord.ui.View):
         
         await interaction.followup.send(embed=embed, ephemeral=True)
 
-class TimerControls(discord.ui.View):
-    def __init__(self, channel_id):
-        super().__init__(timeout=None)
-        self.channel_id = channel_id
+class TimerControls(ClockControls):
 
-    @discord.ui.button(label="Allies", style=discord.ButtonStyle.success, emoji="🇺🇸")
+    @discord.ui.button(label="Allies", custom_id="hll:allies", style=discord.ButtonStyle.success, emoji="🇺🇸")
     async def switch_to_a(self, interaction: discord.Interaction, button: discord.ui.Button):
         await self._switch_team(interaction, "A")
 
-    @discord.ui.button(label="Axis", style=discord.ButtonStyle.secondary, emoji="🇩🇪")
+    @discord.ui.button(label="Axis", custom_id="hll:axis", style=discord.ButtonStyle.secondary, emoji="🇩🇪")
     async def switch_to_b(self, interaction: discord.Interaction, button: discord.ui.Button):
         await self._switch_team(interaction, "B")
 
-    @discord.ui.button(label="🤖 Auto", style=discord.ButtonStyle.secondary)
+    @discord.ui.button(label="🤖 Auto", custom_id="hll:auto", style=discord.ButtonStyle.secondary)
     async def toggle_auto_switch(self, interaction: discord.Interaction, button: discord.ui.Button):
         if not user_is_admin(interaction):
             return await interaction.response.send_message("❌ Admin role required.", ephemeral=True)
 
         clock = clocks[self.channel_id]
         clock.auto_switch = not clock.auto_switch
+        clock.record_settings()
 
         status = "enabled" if clock.auto_switch else "disabled"
 
@@ -913,15 +2714,16 @@ class TimerControls(discord.ui.View):
         await safe_edit_message(clock.message, embed=build_embed(clock), view=self)
 
         if clock.crcon_client and clock.ingame_messages:
-            await clock.crcon_client.send_message(f"🤖 Auto-switch {status}")
+            clock.game_messages.post(f"🤖 Auto-switch {status}", kind='auto_switch')
 
-    @discord.ui.button(label="💬 Msgs", style=discord.ButtonStyle.secondary)
+    @discord.ui.button(label="💬 Msgs", custom_id="hll:msgs", style=discord.ButtonStyle.secondary)
     async def toggle_ingame_messages(self, interaction: discord.Interaction, button: discord.ui.Button):
         if not user_is_admin(interaction):
             return await interaction.response.send_message("❌ Admin role required.", ephemeral=True)
 
         clock = clocks[self.channel_id]
         clock.ingame_messages = not clock.ingame_messages
+        clock.record_settings()
 
         status = "ON" if clock.ingame_messages else "OFF"
 
@@ -929,7 +2731,7 @@ class TimerControls(discord.ui.View):
         await safe_edit_message(clock.message, embed=build_embed(clock), view=self)
         await interaction.followup.send(f"💬 In-game messages: **{status}**", ephemeral=True)
 
-    @discord.ui.button(label="📊 Stats", style=discord.ButtonStyle.secondary)
+    @discord.ui.button(label="📊 Stats", custom_id="hll:stats", style=discord.ButtonStyle.secondary)
     async def show_stats(self, interaction: discord.Interaction, button: discord.ui.Button):
         clock = clocks[self.channel_id]
         await interaction.response.defer(ephemeral=True)
@@ -938,7 +2740,10 @@ class TimerControls(discord.ui.View):
             return await interaction.followup.send("❌ CRCON not connected.", ephemeral=True)
         
         try:
-            await clock.update_from_game()
+            # The match updater keeps running clocks fresh; only fetch if it hasn't lately
+            now = datetime.datetime.now(timezone.utc)
+            if not clock.last_update or (now - clock.last_update).total_seconds() >= get_update_interval(clock.server):
+                await clock.update_from_game()
             game_info = clock.get_game_info()
             
             embed = discord.Embed(title="📊 Live Match Stats", color=0x00ff00)
@@ -966,25 +2771,29 @@ class TimerControls(discord.ui.View):
         except Exception as e:
             await interaction.followup.send(f"❌ Error: {str(e)}", ephemeral=True)
 
-    @discord.ui.button(label="↺ Reset", style=discord.ButtonStyle.primary)
+    @discord.ui.button(label="↺ Reset", custom_id="hll:reset", style=discord.ButtonStyle.primary)
     async def reset_timer(self, interaction: discord.Interaction, button: discord.ui.Button):
         if not user_is_admin(interaction):
             return await interaction.response.send_message("❌ Admin role required.", ephemeral=True)
 
-        old_clock = clocks[self.channel_id]
-        if old_clock.crcon_client:
-            await old_clock.crcon_client.__aexit__(None, None, None)
+        match_scheduler.stop(self.channel_id)
+        clocks[self.channel_id].stop_log_watcher()
+        clocks[self.channel_id].end_journal()
 
+        server = clocks[self.channel_id].server
         clocks[self.channel_id] = ClockState()
         clock = clocks[self.channel_id]
+        clock.server = server
         view = StartControls(self.channel_id)
 
         await interaction.response.defer()
         embed = build_embed(clock)
         await interaction.followup.send(embed=embed, view=view)
         clock.message = await interaction.original_response()
+        clock.journal = MatchJournal(self.channel_id)
+        clock.journal.checkpoint(clock)
 
-    @discord.ui.button(label="⏹️ Stop", style=discord.ButtonStyle.danger)
+    @discord.ui.button(label="⏹️ Stop", custom_id="hll:stop", style=discord.ButtonStyle.danger)
     async def stop_timer(self, interaction: discord.Interaction, button: discord.ui.Button):
         if not user_is_admin(interaction):
             return await interaction.response.send_message("❌ Admin role required.", ephemeral=True)
@@ -992,129 +2801,43 @@ class TimerControls(discord.ui.View):
         clock = clocks[self.channel_id]
 
         # IMPORTANT: Finalize the current session before stopping
-        async with clock._lock:
-            if clock.active and clock.last_switch:
-                elapsed = (datetime.datetime.now(timezone.utc) - clock.last_switch).total_seconds()
-                if clock.active == "A":
-                    clock.time_a += elapsed
-                elif clock.active == "B":
-                    clock.time_b += elapsed
+        now = await clock.stop_match()
 
-            clock.active = None
-            clock.started = False
+        match_scheduler.stop(self.channel_id)
+        clock.stop_log_watcher()
+
+        # The in-game result, the report and the final embed show the same frozen numbers
+        ctx = clock.render_context(now)
+        clock.finish_report(ctx, "stopped")
+        clock.end_journal()
 
         # Send final message to game with DMT scores (if enabled)
         if clock.crcon_client and clock.ingame_messages:
-            allied_scores = clock.calculate_dmt_score('allied')
-            axis_scores = clock.calculate_dmt_score('axis')
-            team_a_name = clock.team_names['allied']
-            team_b_name = clock.team_names['axis']
-
-            if allied_scores['total_dmt'] > axis_scores['total_dmt']:
-                winner_msg = f"{team_a_name} WINS!"
-            elif axis_scores['total_dmt'] > allied_scores['total_dmt']:
-                winner_msg = f"{team_b_name} WINS!"
-            else:
-                winner_msg = "DRAW!"
+            # The result supersedes any capture updates still waiting to go out
+            clock.game_messages.post(format_final_message(ctx), kind='final', replaces=('capture', 'final'))
 
-            await clock.crcon_client.send_message(
-                f"🏁 MATCH COMPLETE! {winner_msg} | {team_a_name}: Combat {allied_scores['combat_total']:,.0f} + Cap {allied_scores['cap_score']:,.0f} = {allied_scores['total_dmt']:,.0f} DMT | {team_b_name}: Combat {axis_scores['combat_total']:,.0f} + Cap {axis_scores['cap_score']:,.0f} = {axis_scores['total_dmt']:,.0f} DMT"
-            )
-
-        # Create final embed with DMT scores
-        allied_scores = clock.calculate_dmt_score('allied')
-        axis_scores = clock.calculate_dmt_score('axis')
-        team_a_name = clock.team_names['allied']
-        team_b_name = clock.team_names['axis']
-
-        embed = discord.Embed(title="🏁 Match Complete - DMT Results!", color=0xFFD700)
-
-        game_info = clock.get_game_info()
-        if game_info['connection_status'] == 'Connected':
-            embed.add_field(name="🗺️ Map", value=game_info['map'], inline=True)
-            embed.add_field(name="👥 Players", value=f"{game_info['players']}/100", inline=True)
-
-        # Final DMT scores
-        embed.add_field(
-            name=f"🇺🇸 {team_a_name} - Final DMT",
-            value=f"**{allied_scores['total_dmt']:,.1f} DMT**\nCombat: {allied_scores['combat_total']:,.0f}\nCap: {allied_scores['cap_score']:,.1f} ({clock.format_time(clock.time_a)})",
-            inline=True
-        )
-        embed.add_field(
-            name=f"🇩🇪 {team_b_name} - Final DMT",
-            value=f"**{axis_scores['total_dmt']:,.1f} DMT**\nCombat: {axis_scores['combat_total']:,.0f}\nCap: {axis_scores['cap_score']:,.1f} ({clock.format_time(clock.time_b)})",
-            inline=True
-        )
-
-        # Determine winner by DMT score
-        if allied_scores['total_dmt'] > axis_scores['total_dmt']:
-            dmt_diff = allied_scores['total_dmt'] - axis_scores['total_dmt']
-            winner = f"🏆 **{team_a_name} Victory**\n*+{dmt_diff:,.1f} DMT advantage*"
-        elif axis_scores['total_dmt'] > allied_scores['total_dmt']:
-            dmt_diff = axis_scores['total_dmt'] - allied_scores['total_dmt']
-            winner = f"🏆 **{team_b_name} Victory**\n*+{dmt_diff:,.1f} DMT advantage*"
-        else:
-            winner = "🤝 **Perfect Draw**\n*Equal DMT scores*"
-
-        embed.add_field(name="🎯 DMT Winner", value=winner, inline=False)
-        embed.add_field(name="🔄 Total Switches", value=str(len(clock.switches)), inline=True)
+        embed = build_final_embed(clock, ctx)
 
         await interaction.response.defer()
         await safe_edit_message(clock.message, embed=embed, view=None)
 
         # Log results
-        await log_results(clock, game_info)
+        await log_results(clock, ctx.game_info)
 
     async def _switch_team(self, interaction: discord.Interaction, team: str):
         if not user_is_admin(interaction):
             return await interaction.response.send_message("❌ Admin role required.", ephemeral=True)
 
         clock = clocks[self.channel_id]
-
-        async with clock._lock:
-            now = datetime.datetime.now(timezone.utc)
-
-            switch_data = {
-                'from_team': clock.active,
-                'to_team': team,
-                'timestamp': now,
-                'method': 'manual'
-            }
-
-            if not clock.clock_started:
-                # First switch - start the clock
-                clock.clock_started = True
-                clock.last_switch = now
-                clock.active = team
-                clock.switches = [switch_data]
-            else:
-                # Subsequent switches - accumulate time properly
-                elapsed = (now - clock.last_switch).total_seconds()
-
-                # Add elapsed time to the previously active team
-                if clock.active == "A":
-                    clock.time_a += elapsed
-                elif clock.active == "B":
-                    clock.time_b += elapsed
-
-                # Switch to new team
-                clock.active = team
-                clock.last_switch = now
-                clock.switches.append(switch_data)
+        now = await clock.manual_switch(team)
 
         # Send notification with DMT scores (if enabled)
+        ctx = clock.render_context(now)
         if clock.crcon_client and clock.ingame_messages:
-            team_name = clock.team_names.get('allied' if team == 'A' else 'axis', 'Allies' if team == 'A' else 'Axis')
-            allied_scores = clock.calculate_dmt_score('allied')
-            axis_scores = clock.calculate_dmt_score('axis')
-            team_a_name = clock.team_names['allied']
-            team_b_name = clock.team_names['axis']
-
-            msg = f"⚔️ {team_name} captured the point! | {team_a_name}: Combat {allied_scores['combat_total']:,.0f} + Cap {allied_scores['cap_score']:,.0f} = {allied_scores['total_dmt']:,.0f} DMT | {team_b_name}: Combat {axis_scores['combat_total']:,.0f} + Cap {axis_scores['cap_score']:,.0f} = {axis_scores['total_dmt']:,.0f} DMT"
-            await clock.crcon_client.send_message(msg)
+            clock.game_messages.post(format_capture_message(ctx, team), kind='capture')
 
         await interaction.response.defer()
-        await safe_edit_message(clock.message, embed=build_embed(clock), view=self)
+        await safe_edit_message(clock.message, embed=build_embed(clock, ctx), view=self)
 
 async def log_results(clock: ClockState, game_info: dict):
     """Log match results focused on time control"""
@@ -1152,10 +2875,10 @@ async def log_results(clock: ClockState, game_info: dict):
     await results_channel.send(embed=embed)
 
 # Validate and parse update interval
-def get_update_interval():
+def get_update_interval(server=None):
     """Get and validate update interval from environment"""
     try:
-        interval = int(os.getenv('UPDATE_INTERVAL', '15'))
+        interval = int(server_env(server, 'UPDATE_INTERVAL', '15'))
         # Clamp to reasonable bounds
         return max(MIN_UPDATE_INTERVAL, min(interval, MAX_UPDATE_INTERVAL))
     except ValueError:
@@ -1163,108 +2886,129 @@ def get_update_interval():
         return 15
 
 # Update task - shows in-game time
-@tasks.loop(seconds=get_update_interval())
 async def match_updater(channel_id):
-    """Update match display with live game time"""
+    """Run one update tick for a match: refresh from CRCON and redraw the embed"""
     clock = clocks.get(channel_id)
     if not clock or not clock.started or not clock.message:
         return
 
+    started = time.perf_counter()
+    tick = current_tick.set((channel_id, object()))
     try:
-        # Update from CRCON if connected
+        # Reconnect if needed - refused without a request while the circuit is open
+        if not clock.crcon_client:
+            await clock.connect_crcon()
+
+        # Update from CRCON if connected; on failure the last good snapshot is rendered
         if clock.crcon_client:
-            try:
-                await clock.update_from_game()
-            except Exception as e:
-                logger.warning(f"CRCON update failed, attempting reconnect: {e}")
-                # Try to reconnect if the session failed
-                await clock.connect_crcon()
+            await clock.update_from_game()
 
         # Check if game has ended (time remaining is 0 or very low)
-        game_info = clock.get_game_info()
+        ctx = clock.render_context()
+        game_info = ctx.game_info
         if game_info['connection_status'] == 'Connected' and game_info['game_time'] <= GAME_END_THRESHOLD:
             logger.info("Game time ended, automatically stopping match")
             await auto_stop_match(clock, game_info)
             return
 
         # Update display with current game time
-        success = await safe_edit_message(clock.message, embed=build_embed(clock))
+        success = await safe_edit_message(clock.message, embed=build_embed(clock, ctx))
         if not success:
             clock.message = None
 
     except Exception as e:
         logger.error(f"Error in match updater: {e}")
+        metrics.inc('hll_tick_errors_total', channel=channel_id)
+    finally:
+        metrics.observe('hll_tick_seconds', time.perf_counter() - started, channel=channel_id)
+        current_tick.reset(tick)
+
+class MatchScheduler:
+    """Owns one independent, cancellable update task per clock in `clocks`"""
+
+    # Golden-ratio spacing keeps tick phases spread out however many matches start
+    PHASE_STEP = 0.6180339887498949
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._tasks = {}
+        self._slot = 0
+
+    def _next_offset(self, interval):
+        """Pick a start offset inside the interval so ticks don't all land together"""
+        offset = (self._slot * self.PHASE_STEP) % 1.0
+        self._slot += 1
+        return offset * interval
+
+    def is_running(self, channel_id):
+        task = self._tasks.get(channel_id)
+        return task is not None and not task.done()
+
+    def start(self, channel_id, interval=None):
+        """Start (or restart) the update task for a channel, every `interval` seconds"""
+        self.stop(channel_id)
+        interval = interval or self.interval
+        task = asyncio.create_task(self._run(channel_id, self._next_offset(interval), interval))
+        self._tasks[channel_id] = task
+        task.add_done_callback(lambda t, cid=channel_id: self._discard(cid, t))
+        logger.info(f"Match updater started for channel {channel_id} ({len(self._tasks)} running)")
+
+    def stop(self, channel_id):
+        """Cancel the update task for a channel, if any"""
+        task = self._tasks.pop(channel_id, None)
+        if task and not task.done():
+            task.cancel()
+
+    def stop_all(self):
+        for channel_id in list(self._tasks):
+            self.stop(channel_id)
+
+    def _discard(self, channel_id, task):
+        if self._tasks.get(channel_id) is task:
+            del self._tasks[channel_id]
+
+    async def _run(self, channel_id, offset, interval):
+        """Tick at a fixed rate from the channel's phase until its clock stops"""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time() + offset
+        while True:
+            await asyncio.sleep(max(0, next_tick - loop.time()))
+
+            clock = clocks.get(channel_id)
+            if not clock or not clock.started:
+                break
+
+            await match_updater(channel_id)
+
+            # Skip ticks we overran instead of bursting to catch up
+            next_tick += interval
+            now = loop.time()
+            if next_tick < now:
+                next_tick += ((now - next_tick) // interval + 1) * interval
+
+        logger.info(f"Match updater stopped for channel {channel_id}")
+
+match_scheduler = MatchScheduler(get_update_interval())
 
 async def auto_stop_match(clock: ClockState, game_info: dict):
     """Automatically stop match when game time ends"""
     try:
         # IMPORTANT: Finalize the current session before stopping
-        async with clock._lock:
-            if clock.active and clock.last_switch:
-                elapsed = (datetime.datetime.now(timezone.utc) - clock.last_switch).total_seconds()
-                if clock.active == "A":
-                    clock.time_a += elapsed
-                elif clock.active == "B":
-                    clock.time_b += elapsed
+        now = await clock.stop_match()
 
-            clock.active = None
-            clock.started = False
+        clock.stop_log_watcher()
+
+        # The in-game result, the report and the final embed show the same frozen numbers
+        ctx = clock.render_context(now)
+        clock.finish_report(ctx, "time_expired")
+        clock.end_journal()
 
         # Send final message to game with DMT scores (if enabled)
         if clock.crcon_client and clock.ingame_messages:
-            allied_scores = clock.calculate_dmt_score('allied')
-            axis_scores = clock.calculate_dmt_score('axis')
-            team_a_name = clock.team_names['allied']
-            team_b_name = clock.team_names['axis']
-
-            if allied_scores['total_dmt'] > axis_scores['total_dmt']:
-                winner_msg = f"{team_a_name} WINS!"
-            elif axis_scores['total_dmt'] > allied_scores['total_dmt']:
-                winner_msg = f"{team_b_name} WINS!"
-            else:
-                winner_msg = "DRAW!"
+            # The result supersedes any capture updates still waiting to go out
+            clock.game_messages.post(format_final_message(ctx), kind='final', replaces=('capture', 'final'))
 
-            await clock.crcon_client.send_message(
-                f"🏁 MATCH COMPLETE! {winner_msg} | {team_a_name}: Combat {allied_scores['combat_total']:,.0f} + Cap {allied_scores['cap_score']:,.0f} = {allied_scores['total_dmt']:,.0f} DMT | {team_b_name}: Combat {axis_scores['combat_total']:,.0f} + Cap {axis_scores['cap_score']:,.0f} = {axis_scores['total_dmt']:,.0f} DMT"
-            )
-
-        # Create final embed with DMT scores
-        allied_scores = clock.calculate_dmt_score('allied')
-        axis_scores = clock.calculate_dmt_score('axis')
-        team_a_name = clock.team_names['allied']
-        team_b_name = clock.team_names['axis']
-
-        embed = discord.Embed(title="🏁 Match Complete - DMT Results!", color=0xFFD700)
-        embed.add_field(name="🕐 End Reason", value="⏰ Game Time Expired", inline=False)
-
-        if game_info['connection_status'] == 'Connected':
-            embed.add_field(name="🗺️ Map", value=game_info['map'], inline=True)
-            embed.add_field(name="👥 Players", value=f"{game_info['players']}/100", inline=True)
-
-        # Final DMT scores
-        embed.add_field(
-            name=f"🇺🇸 {team_a_name} - Final DMT",
-            value=f"**{allied_scores['total_dmt']:,.1f} DMT**\nCombat: {allied_scores['combat_total']:,.0f}\nCap: {allied_scores['cap_score']:,.1f} ({clock.format_time(clock.time_a)})",
-            inline=True
-        )
-        embed.add_field(
-            name=f"🇩🇪 {team_b_name} - Final DMT",
-            value=f"**{axis_scores['total_dmt']:,.1f} DMT**\nCombat: {axis_scores['combat_total']:,.0f}\nCap: {axis_scores['cap_score']:,.1f} ({clock.format_time(clock.time_b)})",
-            inline=True
-        )
-
-        # Determine winner by DMT score
-        if allied_scores['total_dmt'] > axis_scores['total_dmt']:
-            dmt_diff = allied_scores['total_dmt'] - axis_scores['total_dmt']
-            winner = f"🏆 **{team_a_name} Victory**\n*+{dmt_diff:,.1f} DMT advantage*"
-        elif axis_scores['total_dmt'] > allied_scores['total_dmt']:
-            dmt_diff = axis_scores['total_dmt'] - allied_scores['total_dmt']
-            winner = f"🏆 **{team_b_name} Victory**\n*+{dmt_diff:,.1f} DMT advantage*"
-        else:
-            winner = "🤝 **Perfect Draw**\n*Equal DMT scores*"
-
-        embed.add_field(name="🎯 DMT Winner", value=winner, inline=False)
-        embed.add_field(name="🔄 Total Switches", value=str(len(clock.switches)), inline=True)
+        embed = build_final_embed(clock, ctx, end_reason="⏰ Game Time Expired")
 
         # Update the message with final results
         await safe_edit_message(clock.message, embed=embed, view=None)
@@ -1281,11 +3025,70 @@ async def auto_stop_match(clock: ClockState, game_info: dict):
     except Exception as e:
         logger.error(f"Error in auto_stop_match: {e}")
 
+async def restore_clocks():
+    """Rebuild journaled clocks after a restart and reattach them to their messages"""
+    for channel_id, state, records in MatchJournal.load_all():
+        journal = MatchJournal(channel_id)
+        if not state.get('message_id'):
+            journal.discard()
+            continue
+
+        try:
+            channel = bot.get_channel(channel_id) or await bot.fetch_channel(channel_id)
+            message = await channel.fetch_message(state['message_id'])
+        except (discord.NotFound, discord.Forbidden) as e:
+            logger.warning(f"Dropping journal for channel {channel_id}, message unavailable: {e}")
+            journal.discard()
+            continue
+        except discord.HTTPException as e:
+            logger.warning(f"Could not restore clock for channel {channel_id}: {e}")
+            continue
+
+        clock = ClockState.from_checkpoint(state, records)
+        if clock.server is not None and clock.server not in crcon_servers():
+            logger.warning(f"CRCON server '{clock.server}' for channel {channel_id} is no longer configured, using the default server")
+            clock.server = None
+        clock.message = message
+        clock.journal = journal
+        journal.seq = records[-1]['seq'] if records else state.get('seq', 0)
+        journal.checkpoint(clock)
+        clocks[channel_id] = clock
+
+        # Reattach the buttons to the existing message without reposting it
+        view = TimerControls(channel_id) if clock.started else StartControls(channel_id)
+        bot.add_view(view, message_id=message.id)
+
+        if clock.started:
+            clock.start_recording(channel_id)
+            match_scheduler.start(channel_id, get_update_interval(clock.server))
+            if await clock.connect_crcon() and server_env(clock.server, 'CRCON_CAPTURE_SOURCE', 'score').lower() == 'logs':
+                clock.start_log_watcher(CRCONLogSource(clock.crcon_client))
+
+        logger.info(f"Restored clock for channel {channel_id} ({len(clock.switches)} switches)")
+
 # Bot commands
+async def server_autocomplete(interaction: discord.Interaction, current: str):
+    return [
+        app_commands.Choice(name=name, value=name)
+        for name in crcon_servers() if current.lower() in name.lower()
+    ][:25]
+
 @bot.tree.command(name="reverse_clock", description="Start the HLL Tank Overwatch time control clock")
-async def reverse_clock(interaction: discord.Interaction):
+@app_commands.describe(server="CRCON server to track (from CRCON_SERVERS)")
+@app_commands.autocomplete(server=server_autocomplete)
+async def reverse_clock(interaction: discord.Interaction, server: str = None):
+    try:
+        server = crcon_server(server)[0]
+    except ValueError as e:
+        return await interaction.response.send_message(f"❌ {e}", ephemeral=True)
+
     channel_id = interaction.channel_id
+    match_scheduler.stop(channel_id)
+    if channel_id in clocks:
+        clocks[channel_id].stop_log_watcher()
+        clocks[channel_id].end_journal()
     clocks[channel_id] = ClockState()
+    clocks[channel_id].server = server
 
     embed = build_embed(clocks[channel_id])
     view = StartControls(channel_id)
@@ -1293,113 +3096,75 @@ async def reverse_clock(interaction: discord.Interaction):
     await interaction.response.send_message("✅ HLL Tank Overwatch clock ready!", ephemeral=True)
     posted_message = await interaction.channel.send(embed=embed, view=view)
     clocks[channel_id].message = posted_message
+    clocks[channel_id].journal = MatchJournal(channel_id)
+    clocks[channel_id].journal.checkpoint(clocks[channel_id])
 
 @bot.tree.command(name="crcon_status", description="Check CRCON connection status")
-async def crcon_status(interaction: discord.Interaction):
+@app_commands.describe(server="CRCON server to check (defaults to this channel's)")
+@app_commands.autocomplete(server=server_autocomplete)
+async def crcon_status(interaction: discord.Interaction, server: str = None):
     await interaction.response.defer()
 
+    server = server or channel_server(interaction.channel_id)
     embed = discord.Embed(title="🔗 CRCON Status", color=0x0099ff)
+    base_url, api_key = None, None
 
     try:
-        test_client = APIKeyCRCONClient()
-        async with test_client as client:
-            live_data = await client.get_live_game_state()
+        server, base_url, api_key = crcon_server(server)
+        client = await get_crcon_client(server)
+        live_data = await client.get_live_game_state()
 
-            if live_data:
-                game_state = live_data.get('game_state', {})
-                map_info = live_data.get('map_info', {})
-
-                embed.add_field(name="Connection", value="✅ Connected", inline=True)
-                embed.add_field(name="API Key", value="✅ Valid", inline=True)
-                embed.add_field(name="Data", value="✅ Available", inline=True)
-
-                # Extract map name properly
-                map_name = 'Unknown'
-                if isinstance(map_info, dict) and 'result' in map_info:
-                    result = map_info['result']
-                    if isinstance(result, dict):
-                        if 'pretty_name' in result:
-                            map_name = result['pretty_name']
-                        elif 'map' in result and isinstance(result['map'], dict):
-                            map_name = result['map'].get('pretty_name', result['map'].get('name', 'Unknown'))
-
-                # Extract player count properly
-                player_count = 0
-                if isinstance(game_state, dict) and 'result' in game_state:
-                    result = game_state['result']
-                    if isinstance(result, dict):
-                        allied_players = result.get('num_allied_players', 0)
-                        axis_players = result.get('num_axis_players', 0)
-                        player_count = allied_players + axis_players
-
-                embed.add_field(name="Current Map", value=map_name, inline=True)
-                embed.add_field(name="Players", value=f"{player_count}/100", inline=True)
-                embed.add_field(name="Server Status", value="🟢 Online", inline=True)
-            else:
-                embed.add_field(name="Connection", value="🟡 Connected", inline=True)
-                embed.add_field(name="Data", value="❌ No data", inline=True)
+        if live_data:
+            snapshot = parse_game_snapshot(live_data)
+
+            embed.add_field(name="Connection", value="✅ Connected", inline=True)
+            embed.add_field(name="API Key", value="✅ Valid", inline=True)
+            embed.add_field(name="Data", value="✅ Available", inline=True)
+
+            embed.add_field(name="Current Map", value=snapshot.map_name, inline=True)
+            embed.add_field(name="Players", value=f"{snapshot.player_count}/100", inline=True)
+            embed.add_field(name="Server Status", value="🟢 Online", inline=True)
+        else:
+            embed.add_field(name="Connection", value="🟡 Connected", inline=True)
+            embed.add_field(name="Data", value="❌ No data", inline=True)
                 
     except Exception as e:
         embed.add_field(name="Connection", value="❌ Failed", inline=True)
         embed.add_field(name="Error", value=str(e)[:500], inline=False)
     
     # Configuration info (avoid exposing partial API key)
-    embed.add_field(name="URL", value=os.getenv('CRCON_URL', 'Not set'), inline=True)
-    embed.add_field(name="API Key", value="✅ Configured" if os.getenv('CRCON_API_KEY') else '❌ Not set', inline=True)
+    if os.getenv('CRCON_SERVERS') and server:
+        embed.add_field(name="Server", value=server, inline=True)
+    embed.add_field(name="URL", value=base_url or 'Not set', inline=True)
+    embed.add_field(name="API Key", value="✅ Configured" if api_key else '❌ Not set', inline=True)
     
     await interaction.followup.send(embed=embed)
 
 @bot.tree.command(name="server_info", description="Get current HLL server information")
-async def server_info(interaction: discord.Interaction):
+@app_commands.describe(server="CRCON server to query (defaults to this channel's)")
+@app_commands.autocomplete(server=server_autocomplete)
+async def server_info(interaction: discord.Interaction, server: str = None):
     await interaction.response.defer()
 
     try:
-        test_client = APIKeyCRCONClient()
-        async with test_client as client:
-            live_data = await client.get_live_game_state()
-
-            if not live_data:
-                return await interaction.followup.send("❌ Could not retrieve server information")
-
-            embed = discord.Embed(title="🎮 HLL Server Information", color=0x00ff00)
+        client = await get_crcon_client(server or channel_server(interaction.channel_id))
+        live_data = await client.get_live_game_state()
 
-            game_state = live_data.get('game_state', {})
-            map_info = live_data.get('map_info', {})
+        if not live_data:
+            return await interaction.followup.send("❌ Could not retrieve server information")
 
-            # Extract map info properly
-            map_name = 'Unknown'
-            if isinstance(map_info, dict) and 'result' in map_info:
-                result = map_info['result']
-                if isinstance(result, dict):
-                    if 'pretty_name' in result:
-                        map_name = result['pretty_name']
-                    elif 'map' in result and isinstance(result['map'], dict):
-                        map_name = result['map'].get('pretty_name', result['map'].get('name', 'Unknown'))
-
-            # Extract player count properly
-            player_count = 0
-            if isinstance(game_state, dict) and 'result' in game_state:
-                result = game_state['result']
-                if isinstance(result, dict):
-                    allied_players = result.get('num_allied_players', 0)
-                    axis_players = result.get('num_axis_players', 0)
-                    player_count = allied_players + axis_players
+        embed = discord.Embed(title="🎮 HLL Server Information", color=0x00ff00)
 
-            embed.add_field(name="🗺️ Map", value=map_name, inline=True)
-            embed.add_field(name="👥 Players", value=f"{player_count}/100", inline=True)
+        snapshot = parse_game_snapshot(live_data)
 
-            # Extract time remaining properly
-            time_remaining = 0
-            if isinstance(game_state, dict) and 'result' in game_state:
-                result = game_state['result']
-                if isinstance(result, dict):
-                    time_remaining = result.get('time_remaining', 0)
+        embed.add_field(name="🗺️ Map", value=snapshot.map_name, inline=True)
+        embed.add_field(name="👥 Players", value=f"{snapshot.player_count}/100", inline=True)
 
-            if time_remaining > 0:
-                embed.add_field(name="⏱️ Game Time", value=f"{time_remaining//60}:{time_remaining%60:02d}", inline=True)
-            
-            embed.timestamp = datetime.datetime.now(timezone.utc)
-            await interaction.followup.send(embed=embed)
+        time_remaining = int(snapshot.time_remaining)
+        if time_remaining > 0:
+            embed.add_field(name="⏱️ Game Time", value=f"{time_remaining//60}:{time_remaining%60:02d}", inline=True)
+        embed.timestamp = datetime.datetime.now(timezone.utc)
+        await interaction.followup.send(embed=embed)
             
     except Exception as e:
         await interaction.followup.send(f"❌ Error retrieving server info: {str(e)}")
@@ -1409,44 +3174,43 @@ async def test_map(interaction: discord.Interaction):
     await interaction.response.defer(ephemeral=True)
 
     try:
-        test_client = APIKeyCRCONClient()
-        async with test_client as client:
-            live_data = await client.get_live_game_state()
+        client = await get_crcon_client(channel_server(interaction.channel_id))
+        live_data = await client.get_live_game_state()
 
-            if not live_data:
-                return await interaction.followup.send("❌ No data", ephemeral=True)
+        if not live_data:
+            return await interaction.followup.send("❌ No data", ephemeral=True)
 
-            game_state = live_data.get('game_state', {})
+        game_state = live_data.get('game_state', {})
 
-            # Format game_state data
-            import json
-            game_state_str = json.dumps(game_state, indent=2)
+        # Format game_state data
+        import json
+        game_state_str = json.dumps(game_state, indent=2)
 
-            # Send overview
-            embed = discord.Embed(title="📊 Game State Debug", color=0x00ff00)
-            embed.add_field(name="Data Type", value=str(type(game_state)), inline=True)
+        # Send overview
+        embed = discord.Embed(title="📊 Game State Debug", color=0x00ff00)
+        embed.add_field(name="Data Type", value=str(type(game_state)), inline=True)
 
-            if isinstance(game_state, dict):
-                embed.add_field(name="Top Keys", value=str(list(game_state.keys())[:10]), inline=False)
+        if isinstance(game_state, dict):
+            embed.add_field(name="Top Keys", value=str(list(game_state.keys())[:10]), inline=False)
 
-                # Try to extract player count different ways
-                if 'result' in game_state:
-                    result = game_state['result']
-                    if isinstance(result, dict):
-                        embed.add_field(name="Result Keys", value=str(list(result.keys())[:15]), inline=False)
+            # Try to extract player count different ways
+            if 'result' in game_state:
+                result = game_state['result']
+                if isinstance(result, dict):
+                    embed.add_field(name="Result Keys", value=str(list(result.keys())[:15]), inline=False)
 
-                        # Show player count fields
-                        player_fields = {k: v for k, v in result.items() if 'player' in k.lower() or 'num' in k.lower()}
-                        if player_fields:
-                            embed.add_field(name="Player-related Fields", value=str(player_fields), inline=False)
+                    # Show player count fields
+                    player_fields = {k: v for k, v in result.items() if 'player' in k.lower() or 'num' in k.lower()}
+                    if player_fields:
+                        embed.add_field(name="Player-related Fields", value=str(player_fields), inline=False)
 
-            await interaction.followup.send(embed=embed, ephemeral=True)
+        await interaction.followup.send(embed=embed, ephemeral=True)
 
-            # Send raw data in chunks
-            chunk_size = 1900
-            for i in range(0, min(len(game_state_str), 3800), chunk_size):  # Max 2 messages
-                chunk = game_state_str[i:i+chunk_size]
-                await interaction.followup.send(f"```json\n{chunk}\n```", ephemeral=True)
+        # Send raw data in chunks
+        chunk_size = 1900
+        for i in range(0, min(len(game_state_str), 3800), chunk_size):  # Max 2 messages
+            chunk = game_state_str[i:i+chunk_size]
+            await interaction.followup.send(f"```json\n{chunk}\n```", ephemeral=True)
 
     except Exception as e:
         await interaction.followup.send(f"❌ Error: {str(e)}", ephemeral=True)
@@ -1457,35 +3221,32 @@ async def test_player_scores(interaction: discord.Interaction):
     await interaction.response.defer(ephemeral=True)
 
     try:
-        test_client = APIKeyCRCONClient()
-        async with test_client as client:
-            # Get detailed players data
-            live_data = await client.get_live_game_state()
-
-            if not live_data or 'detailed_players' not in live_data:
-                return await interaction.followup.send("❌ No detailed player data available", ephemeral=True)
+        client = await get_crcon_client(channel_server(interaction.channel_id))
+        # Get the raw detailed players document
+        detailed_players = await client._get_endpoint('/api/get_detailed_players')
 
-            detailed_players = live_data['detailed_players']
+        if not detailed_players:
+            return await interaction.followup.send("❌ No detailed player data available", ephemeral=True)
 
-            # Format data structure overview
-            import json
-            data_str = json.dumps(detailed_players, indent=2)
+        # Format data structure overview
+        import json
+        data_str = json.dumps(detailed_players, indent=2)
 
-            # Send first chunk as embed with overview
-            embed = discord.Embed(title="📊 CRCON Player Data Structure", color=0x00ff00)
-            embed.add_field(name="✅ Endpoint", value="/api/get_detailed_players", inline=False)
-            embed.add_field(name="Data Type", value=str(type(detailed_players)), inline=True)
+        # Send first chunk as embed with overview
+        embed = discord.Embed(title="📊 CRCON Player Data Structure", color=0x00ff00)
+        embed.add_field(name="✅ Endpoint", value="/api/get_detailed_players", inline=False)
+        embed.add_field(name="Data Type", value=str(type(detailed_players)), inline=True)
 
-            if isinstance(detailed_players, dict):
-                embed.add_field(name="Top-level Keys", value=str(list(detailed_players.keys())[:10]), inline=False)
+        if isinstance(detailed_players, dict):
+            embed.add_field(name="Top-level Keys", value=str(list(detailed_players.keys())[:10]), inline=False)
 
-            await interaction.followup.send(embed=embed, ephemeral=True)
+        await interaction.followup.send(embed=embed, ephemeral=True)
 
-            # Send raw data in chunks (Discord has 2000 char limit per message)
-            chunk_size = 1900
-            for i in range(0, min(len(data_str), 5700), chunk_size):  # Max 3 messages
-                chunk = data_str[i:i+chunk_size]
-                await interaction.followup.send(f"```json\n{chunk}\n```", ephemeral=True)
+        # Send raw data in chunks (Discord has 2000 char limit per message)
+        chunk_size = 1900
+        for i in range(0, min(len(data_str), 5700), chunk_size):  # Max 3 messages
+            chunk = data_str[i:i+chunk_size]
+            await interaction.followup.send(f"```json\n{chunk}\n```", ephemeral=True)
 
     except Exception as e:
         await interaction.followup.send(f"❌ Error: {str(e)}", ephemeral=True)
@@ -1504,25 +3265,50 @@ async def send_server_message(interaction: discord.Interaction, message: str):
 
     await interaction.response.defer(ephemeral=True)
 
+    # Per-player delivery can take a while on a full server - show how far it got
+    progress_edit = None
+    last_progress = 0.0
+
+    async def edit_progress(done, total):
+        try:
+            await interaction.edit_original_response(content=f"📤 Sending... {done}/{total} players")
+        except discord.HTTPException as e:
+            logger.debug(f"Could not update message progress: {e}")
+
+    def show_progress(done, total):
+        nonlocal progress_edit, last_progress
+        now = time.monotonic()
+        if now - last_progress < 2 or (progress_edit and not progress_edit.done()):
+            return
+        last_progress = now
+        progress_edit = asyncio.create_task(edit_progress(done, total))
+
     try:
-        test_client = APIKeyCRCONClient()
-        async with test_client as client:
-            success = await client.send_message(f"📢 [Discord] {message}")
-            
-            if success:
-                embed = discord.Embed(
-                    title="📢 Message Sent",
-                    description=f"Successfully sent to server:\n\n*{message}*",
-                    color=0x00ff00
-                )
+        client = await get_crcon_client(channel_server(interaction.channel_id))
+        result = await client.broadcast_message(f"📢 [Discord] {message}", progress=show_progress)
+        if progress_edit:
+            await progress_edit
+
+        if not result['error'] and (result['mode'] == 'server' or result['total'] == 0 or result['sent'] > 0):
+            embed = discord.Embed(
+                title="📢 Message Sent",
+                description=f"Successfully sent to server:\n\n*{message}*",
+                color=0x00ff00
+            )
+            if result['mode'] == 'server':
+                delivered = f"Server-wide in {result['elapsed']:.1f}s"
             else:
-                embed = discord.Embed(
-                    title="⚠️ Message Not Sent",
-                    description="Message endpoints not available on this CRCON version",
-                    color=0xffaa00
-                )
-            
-            await interaction.followup.send(embed=embed, ephemeral=True)
+                delivered = f"{result['sent']}/{result['total']} players in {result['elapsed']:.1f}s"
+            embed.add_field(name="Delivered", value=delivered, inline=True)
+        else:
+            embed = discord.Embed(
+                title="⚠️ Message Not Sent",
+                description="Message endpoints not available on this CRCON version",
+                color=0xffaa00
+            )
+
+        # Replace the progress line with the result
+        await interaction.edit_original_response(content=None, embed=embed)
             
     except Exception as e:
         await interaction.followup.send(f"❌ Error: {str(e)}", ephemeral=True)
@@ -1540,6 +3326,7 @@ async def set_team_names_cmd(interaction: discord.Interaction, team_a: str = "Al
     clock = clocks[channel_id]
     clock.team_names['allied'] = team_a
     clock.team_names['axis'] = team_b
+    clock.record_settings()
 
     embed = discord.Embed(title="✅ Team Names Updated", color=0x00ff00)
     embed.add_field(name="Allied Team", value=team_a, inline=True)
@@ -1577,6 +3364,7 @@ async def set_crew_squads(
         'crew4': crew4,
         'commander': commander
     }
+    clock.record_settings()
 
     team_name = clock.team_names[team_key]
     embed = discord.Embed(title=f"⚙️ Squad Configuration - {team_name}", color=0x0099ff)
@@ -1722,34 +3510,99 @@ async def on_app_command_error(interaction: discord.Interaction, error: discord.
     except Exception as e:
         logger.error(f"Unexpected error sending error message: {e}")
 
-@bot.event
-async def on_ready():
-    logger.info(f"✅ Bot logged in as {bot.user}")
-    logger.info(f"🔗 CRCON URL: {os.getenv('CRCON_URL', 'Not configured')}")
-    
-    # Test CRCON connection on startup
+def command_tree_hash():
+    """Fingerprint of the slash commands as Discord would receive them"""
     try:
-        test_client = APIKeyCRCONClient()
-        async with test_client as client:
-            live_data = await client.get_live_game_state()
-            if live_data:
-                logger.info("✅ CRCON connection verified on startup")
-            else:
-                logger.warning("🟡 CRCON connected but no game data")
+        payload = [command.to_dict(bot.tree) for command in bot.tree.get_commands()]
+    except TypeError:
+        # discord.py < 2.4 serializes commands without the tree
+        payload = [command.to_dict() for command in bot.tree.get_commands()]
+    payload.sort(key=lambda command: command['name'])
+    blob = json.dumps({'application_id': bot.application_id, 'commands': payload}, sort_keys=True)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+async def sync_command_tree():
+    """Sync slash commands with Discord only when the tree differs from the last sync"""
+    path = Path(os.getenv('MATCH_DATA_DIR', 'match_data')) / 'command_tree.sha256'
+    force = os.getenv('FORCE_COMMAND_SYNC', 'false').lower() == 'true'
+
+    digest = None
+    try:
+        digest = command_tree_hash()
+        if not force and path.read_text().strip() == digest:
+            logger.info("✅ Slash commands unchanged, skipping sync")
+            return
+    except OSError:
+        pass
     except Exception as e:
-        logger.warning(f"⚠️ CRCON connection test failed: {e}")
-    
-    # Sync commands
-    await bot.wait_until_ready()
+        # Without a fingerprint, always sync
+        logger.warning(f"Could not fingerprint the command tree, syncing anyway: {e}")
+
     try:
         synced = await bot.tree.sync()
         logger.info(f"✅ Synced {len(synced)} slash commands")
-        print(f"🎉 HLL Tank Overwatch Clock ready! Use /reverse_clock to start")
     except Exception as e:
         logger.error(f"❌ Command sync failed: {e}")
+        return
+
+    if digest is None:
+        return
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(digest)
+    except OSError as e:
+        logger.warning(f"Could not store command tree hash in {path}: {e}")
+
+async def warm_up_crcon(server):
+    """Connect the shared client for a CRCON server and prime its response cache"""
+    try:
+        client = await get_crcon_client(server)
+        live_data = await client.get_live_game_state()
+        if live_data:
+            logger.info(f"✅ CRCON connection verified on startup ({server})")
+        else:
+            logger.warning(f"🟡 CRCON connected but no game data ({server})")
+    except Exception as e:
+        logger.warning(f"⚠️ CRCON connection test failed ({server}): {e}")
+
+@bot.event
+async def on_ready():
+    logger.info(f"✅ Bot logged in as {bot.user}")
+    for name, (url, _) in crcon_servers().items():
+        logger.info(f"🔗 CRCON server {name}: {url}")
+
+    # Resume matches that were running before a restart (on_ready also fires on reconnects)
+    if not bot.clocks_restored:
+        bot.clocks_restored = True
+        try:
+            await restore_clocks()
+        except Exception as e:
+            logger.error(f"Failed to restore clocks: {e}")
+    
+    # Probe CRCON in the background so the bot is usable straight away
+    if not bot.warmup_tasks:
+        bot.warmup_tasks = [asyncio.create_task(warm_up_crcon(name)) for name in crcon_servers()]
+
+    # Register slash commands once per process, and only if they changed
+    if not bot.commands_synced:
+        bot.commands_synced = True
+        await sync_command_tree()
+    print("🎉 HLL Tank Overwatch Clock ready! Use /reverse_clock to start")
 
 # Main execution
+def run_replay(paths):
+    """Replay recorded matches and print their results (python enhanced_discord_bot.py --replay FILE...)"""
+    logger.setLevel(logging.WARNING)
+    for path in paths:
+        result = asyncio.run(replay_match(path))
+        print(f"🎬 {path}: {result['ticks']} snapshots replayed in {result['elapsed'] * 1000:.0f} ms")
+        print(json.dumps(result, indent=2, default=_json_default))
+
 if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == '--replay':
+        run_replay(sys.argv[2:])
+        sys.exit(0)
+
     print("🚀 Starting HLL Tank Overwatch Bot...")
     print("📝 Version: Updated with corrected CRCON endpoints")
     
@@ -1762,20 +3615,18 @@ if __name__ == "__main__":
         print("3. Edit .env file and set DISCORD_TOKEN=your_actual_token")
         exit(1)
     
-    # Check for API key
-    api_key = os.getenv("CRCON_API_KEY")
-    if not api_key or api_key == "your_crcon_api_key_here":
-        print("❌ CRCON_API_KEY not configured!")
-        print("Edit .env file and set CRCON_API_KEY=your_crcon_api_key_here")
-        exit(1)
-    
-    # Validate CRCON URL
-    crcon_url = os.getenv('CRCON_URL', 'http://localhost:8010')
-    if not crcon_url.startswith(('http://', 'https://')):
-        print("⚠️ WARNING: CRCON_URL should start with http:// or https://")
-
-    # Show configuration (without sensitive data)
-    print(f"🔗 CRCON: {crcon_url}")
+    # Check every CRCON server has an API key and a valid URL
+    for server_name, (crcon_url, api_key) in crcon_servers().items():
+        if not api_key or api_key == "your_crcon_api_key_here":
+            print(f"❌ CRCON_API_KEY not configured for server {server_name}!")
+            print("Edit .env file and set CRCON_API_KEY=your_crcon_api_key_here")
+            exit(1)
+
+        if not crcon_url.startswith(('http://', 'https://')):
+            print(f"⚠️ WARNING: CRCON URL for {server_name} should start with http:// or https://")
+
+        # Show configuration (without sensitive data)
+        print(f"🔗 CRCON ({server_name}): {crcon_url}")
     print(f"🔑 API Key: {'*' * 8}... (configured)")
     print(f"👑 Admin Role: {os.getenv('ADMIN_ROLE_NAME', 'admin')}")
     print(f"🤖 Bot Name: {os.getenv('BOT_NAME', 'HLLTankBot')}")
@@ -1792,7 +3643,8 @@ if __name__ == "__main__":
     print("✅ Endpoint Update: Fixed get_player_ids endpoint")
     
     try:
-        bot.run(token)
+        # Logging is already set up; discord.py's own handler would write synchronously
+        bot.run(token, log_handler=None)
     except Exception as e:
         logger.error(f"Failed to start bot: {e}")
         print(f"❌ Bot startup failed: {e}")
@@ -0,0 +1,61 @@
+"""Discord message edits are merged, deduplicated and re-queued after rate limits"""
+
+import asyncio
+import unittest
+from types import SimpleNamespace
+
+import discord
+
+import enhanced_discord_bot as hll
+
+
+class FakeMessage:
+    """Stands in for a discord.Message, recording every edit that reaches Discord"""
+
+    def __init__(self, rate_limited=0):
+        self.id = 1
+        self.channel = SimpleNamespace(id=10)
+        self.edits = []
+        self.rate_limited = rate_limited
+
+    async def edit(self, **kwargs):
+        if self.rate_limited:
+            self.rate_limited -= 1
+            raise discord.RateLimited(0.05)
+        self.edits.append(kwargs)
+
+
+class MessageEditQueueTest(unittest.IsolatedAsyncioTestCase):
+    async def test_edits_waiting_for_the_channel_are_merged(self):
+        queue = hll.MessageEditQueue(0.05)
+        message = FakeMessage()
+
+        self.assertTrue(await queue.edit(message, content='a'))
+        # Both wait out the interval behind the first edit and go out as one
+        results = await asyncio.gather(queue.edit(message, content='b'),
+                                       queue.edit(message, content='c', embed=None))
+        self.assertEqual(results, [True, True])
+        self.assertEqual(message.edits, [{'content': 'a'}, {'content': 'c', 'embed': None}])
+
+    async def test_identical_edit_is_skipped(self):
+        queue = hll.MessageEditQueue(0)
+        message = FakeMessage()
+        embed = discord.Embed(title="Clock", description="Allies 1:00")
+
+        self.assertTrue(await queue.edit(message, embed=embed))
+        self.assertTrue(await queue.edit(message, embed=discord.Embed(title="Clock", description="Allies 1:00")))
+        self.assertEqual(len(message.edits), 1)
+
+        self.assertTrue(await queue.edit(message, embed=discord.Embed(title="Clock", description="Allies 1:01")))
+        self.assertEqual(len(message.edits), 2)
+
+    async def test_rate_limited_edit_is_retried(self):
+        queue = hll.MessageEditQueue(0)
+        message = FakeMessage(rate_limited=1)
+
+        self.assertTrue(await queue.edit(message, content='a'))
+        self.assertEqual(message.edits, [{'content': 'a'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+"""Journaled clocks are rebuilt from their checkpoint plus the records written after it"""
+
+import datetime
+import tempfile
+import unittest
+
+import enhanced_discord_bot as hll
+
+
+class MatchJournalRestoreTest(unittest.TestCase):
+    def test_restore_from_checkpoint_and_torn_journal(self):
+        directory = tempfile.mkdtemp()
+        start = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+        journal = hll.MatchJournal(7, directory=directory)
+
+        clock = hll.ClockState()
+        clock.journal = journal
+        clock.auto_switch = True
+        clock.record_settings()
+        clock.time_a = 30.0
+        clock.active = 'A'
+        clock.last_switch = start
+        clock.switches = [{'from_team': None, 'to_team': 'A', 'timestamp': start, 'method': 'Manual'}]
+        journal.checkpoint(clock)
+
+        # Written after the checkpoint, so only the journal has them
+        switched = start + datetime.timedelta(seconds=90)
+        journal.append('start', match_start_time=start)
+        journal.append('switch', switch={'from_team': 'A', 'to_team': 'B', 'timestamp': switched, 'method': 'Manual'},
+                       time_a=90.0, time_b=0.0)
+        journal._close_file()
+
+        # A crash mid-write leaves half a record at the end
+        with open(journal.journal_path, 'a', encoding='utf-8') as f:
+            f.write('{"seq": 4, "event": "swi')
+
+        saved = hll.MatchJournal.load_all(directory)
+        self.assertEqual(len(saved), 1)
+        channel_id, state, records = saved[0]
+        self.assertEqual(channel_id, 7)
+        self.assertEqual(state['seq'], 1)
+        self.assertEqual([record['seq'] for record in records], [2, 3])
+        self.assertEqual(records[-1]['seq'], journal.seq)
+
+        restored = hll.ClockState.from_checkpoint(state, records)
+        self.assertEqual(restored.time_a, 90.0)
+        self.assertEqual(restored.time_b, 0.0)
+        self.assertEqual(restored.active, 'B')
+        self.assertEqual(restored.last_switch, switched)
+        self.assertTrue(restored.started)
+        self.assertTrue(restored.auto_switch)
+        self.assertEqual([s['to_team'] for s in restored.switches], ['A', 'B'])
+        self.assertEqual(restored.switches[0]['timestamp'], start)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+"""Log-driven capture detection, run against FakeLogSource"""
+
+import unittest
+
+import enhanced_discord_bot as hll
+
+
+class LogLinesAfterTest(unittest.TestCase):
+    def test_cursor_skips_lines_already_seen(self):
+        lines = [
+            {'timestamp_ms': 1000, 'raw': 'Allies captured the point'},
+            {'timestamp_ms': 2000, 'raw': 'Axis captured the point'},
+        ]
+        fresh, cursor = hll._log_lines_after(lines, None)
+        self.assertEqual(len(fresh), 2)
+
+        fresh, cursor = hll._log_lines_after(lines, cursor)
+        self.assertEqual(fresh, [])
+
+    def test_new_line_at_newest_timestamp_is_not_lost(self):
+        lines = [{'timestamp_ms': 2000, 'raw': 'Axis captured the point'}]
+        _, cursor = hll._log_lines_after(lines, None)
+
+        lines.append({'timestamp_ms': 2000, 'raw': 'Allies captured the point'})
+        fresh, cursor = hll._log_lines_after(lines, cursor)
+        self.assertEqual([l['raw'] for l in fresh], ['Allies captured the point'])
+
+        fresh, _ = hll._log_lines_after(lines, cursor)
+        self.assertEqual(fresh, [])
+
+
+class CaptureLogWatcherTest(unittest.IsolatedAsyncioTestCase):
+    def make_watcher(self):
+        clock = hll.ClockState()
+        clock.started = True
+        clock.auto_switch = True
+        source = hll.FakeLogSource()
+        return clock, source, hll.CaptureLogWatcher(clock, source)
+
+    async def test_capture_lines_switch_the_clock(self):
+        clock, source, watcher = self.make_watcher()
+        source.push('Allies captured the point', timestamp_ms=1000)  # Before the watcher started
+        await watcher.poll()
+        self.assertEqual(clock.switches, [])  # Old lines only position the cursor
+
+        source.push('Axis captured the point', timestamp_ms=2000)
+        await watcher.poll()
+        source.push('[12:04 min (724)] Allied team captured the point', timestamp_ms=3000)
+        source.push('Player joined the server', timestamp_ms=3000)
+        await watcher.poll()
+        await watcher.poll()  # Nothing new - the cursor must not replay lines
+
+        self.assertEqual([s['to_team'] for s in clock.switches], ['B', 'A'])
+        self.assertEqual(clock.active, 'A')
+
+    async def test_player_lines_never_switch(self):
+        clock, source, watcher = self.make_watcher()
+        await watcher.poll()
+
+        source.push('[1:02 min (62)] CHAT[Team][Bob(Axis/76561198000000001)]: go capture the mid', timestamp_ms=1000)
+        source.push('CHAT[Allies][Jim(Allies/76561198000000002)]: they captured it lol', timestamp_ms=1001)
+        source.push('KILL: Jim(Allies/76561198000000002) -> Axis captured(Axis/76561198000000003) with M1 GARAND',
+                    timestamp_ms=1002)
+        source.lines.append({'timestamp_ms': 1003, 'action': 'MESSAGE', 'raw': 'Axis captured the point'})
+        await watcher.poll()
+
+        self.assertEqual(clock.switches, [])
+        self.assertIsNone(clock.active)
+
+
+class StubClient:
+    """Stands in for APIKeyCRCONClient: counts log requests and can fail them"""
+
+    def __init__(self, breaker):
+        self.breaker = breaker
+        self.requests = 0
+        self.up = False
+
+    async def _get_endpoint(self, endpoint):
+        self.requests += 1
+        return {'result': {'logs': []}} if self.up else {}
+
+
+class CRCONLogSourceBreakerTest(unittest.IsolatedAsyncioTestCase):
+    async def test_open_circuit_stops_polling(self):
+        client = StubClient(hll.CircuitBreaker('logs.test', threshold=2, base_delay=60, max_delay=60))
+        source = hll.CRCONLogSource(client)
+
+        for _ in range(2):
+            self.assertEqual(await source.fetch(None), ([], None))
+        self.assertEqual(client.breaker.state, 'open')
+
+        with self.assertRaises(hll.CRCONUnavailable):
+            await source.fetch(None)
+        self.assertEqual(client.requests, 2)
+
+        client.up = True
+        client.breaker.retry_at = 0
+        await source.fetch(None)
+        self.assertEqual(client.breaker.state, 'closed')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+"""Post-match reports survive a bot crash and restart"""
+
+import datetime
+import tempfile
+import unittest
+
+import enhanced_discord_bot as hll
+
+
+class MatchReportRestartTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.start = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+        self.clock = hll.ClockState()
+        self.clock._now = lambda: self.start
+        self.clock.match_start_time = self.start
+
+    def crash_and_restart(self, report):
+        """Leave the file as a killed process would: flushed, with no gzip trailer"""
+        crashed = report.path.read_bytes()
+        report.close()
+        report.path.write_bytes(crashed)
+        return hll.MatchReport(1, self.start, directory=self.directory)
+
+    def test_report_reads_back_across_a_restart(self):
+        report = hll.MatchReport(1, self.start, directory=self.directory)
+        report.write_header(self.clock)
+        report.write_scores(self.start, [hll.PlayerScore('allied', 'able', 'Jim', 120)])
+
+        report = self.crash_and_restart(report)
+        report.write_header(self.clock)
+        report.write_switch({'to_team': 'A', 'timestamp': self.start}, 0, 0)
+        report.write_scores(self.start, [hll.PlayerScore('allied', 'able', 'Jim', 180),
+                                         hll.PlayerScore('axis', 'baker', 'Bob', 90)])
+        report.finish(self.clock, self.clock.render_context(), 'stopped')
+
+        result = hll.load_report(report.path)
+        self.assertEqual(len(result['switches']), 1)
+        self.assertEqual(result['players']['allied'], {'able': {'Jim': 180}})
+        self.assertEqual(result['players']['axis'], {'baker': {'Bob': 90}})
+        self.assertEqual(result['final']['end_reason'], 'stopped')
+
+    def test_discard_removes_every_segment(self):
+        report = hll.MatchReport(1, self.start, directory=self.directory)
+        report.write_header(self.clock)
+        report = self.crash_and_restart(report)
+        report.write_header(self.clock)
+
+        report.discard()
+        self.assertFalse(any(segment.exists() for segment in hll.gzip_segments(report.path)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+"""Replaying a recorded match reproduces the live clock"""
+
+import datetime
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import enhanced_discord_bot as hll
+
+
+def live_data(allied_combat, axis_combat):
+    """A minimal get_live_game_state result with one player per side"""
+    def player(name, team, combat):
+        return {'name': name, 'player_id': name, 'team': team, 'unit_name': 'Able', 'combat': combat}
+
+    return {
+        'game_state': {'result': {'num_allied_players': 1, 'num_axis_players': 1, 'allied_score': 2,
+                                  'axis_score': 3, 'time_remaining': 3000,
+                                  'current_map': {'id': 'foy_warfare', 'pretty_name': 'Foy'}}},
+        'map_info': {'result': {'id': 'foy_warfare', 'pretty_name': 'Foy'}},
+        'detailed_players': {'result': {'players': {'allied': [player('Jim', 'allies', allied_combat)],
+                                                    'axis': [player('Bob', 'axis', axis_combat)]}}},
+    }
+
+
+class ReplayMatchTest(unittest.IsolatedAsyncioTestCase):
+    async def test_replay_matches_the_live_final_result(self):
+        directory = tempfile.mkdtemp()
+        start = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+        now = [start]
+
+        with mock.patch.dict(os.environ, {'RECORD_MATCHES': 'true', 'MATCH_REPORTS': 'false',
+                                          'MATCH_RECORD_DIR': directory}):
+            clock = hll.ClockState()
+            clock._now = lambda: now[0]
+            clock.match_start_time = start
+            clock.started = True
+            clock.start_recording(1)
+
+        # A repeated switch to the team already holding the point is still recorded live
+        for seconds, team in ((10, 'A'), (70, 'A'), (130, 'B'), (400, 'A')):
+            now[0] = start + datetime.timedelta(seconds=seconds)
+            await clock.manual_switch(team)
+            await clock.apply_game_data(live_data(seconds, 2 * seconds))
+
+        # Stopped between updates: the replay must bank the hold up to the stop, not the last update
+        now[0] = start + datetime.timedelta(seconds=500)
+        await clock.stop_match()
+        path = clock.recorder.path
+        clock.end_journal()
+
+        result = await hll.replay_match(path)
+        self.assertEqual(len(result['switches']), len(clock.switches))
+        self.assertEqual(result['time_a'], clock.time_a)
+        self.assertEqual(result['time_b'], clock.time_b)
+        self.assertEqual(clock.time_a, 220.0)
+        self.assertEqual(result['allied']['total_dmt'], clock.calculate_dmt_score('allied')['total_dmt'])
+        self.assertEqual(result['axis']['total_dmt'], clock.calculate_dmt_score('axis')['total_dmt'])
+
+
+class CrashedRecordingTest(unittest.TestCase):
+    def test_restart_after_crash_keeps_every_record(self):
+        directory = tempfile.mkdtemp()
+        start = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+
+        recorder = hll.MatchRecorder(1, start, directory=directory)
+        recorder.write_event(start, 'start', {})
+        recorder.write_event(start, 'settings', {'auto_switch': True})
+        crashed = recorder.path.read_bytes()  # Flushed, but no gzip trailer yet
+        recorder.close()
+        recorder.path.write_bytes(crashed)
+
+        restarted = hll.MatchRecorder(1, start, directory=directory)
+        restarted.write_event(start, 'switch', {'switch': {'to_team': 'A'}})
+        restarted.close()
+
+        events = [record['record']['event'] for record in hll.load_recording(recorder.path)]
+        self.assertEqual(events, ['start', 'settings', 'switch'])
+        self.assertEqual(len(hll.gzip_segments(recorder.path)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()